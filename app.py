@@ -1,15 +1,9 @@
 import os
 from dotenv import load_dotenv
 import streamlit as st
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from data_processor import DataProcessor
-from model import DiseasePredictor
-from chat_diagnosis import DiagnosisChat
-from diagnostic_test import DiagnosticTest
-from health_knowledge_base import HealthKnowledgeBase
-import requests
+import registry
+# The Gemini client, the chart renderer and the mode modules are imported where they are
+# first used, so a cold start only pays for what the chosen mode needs
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -17,22 +11,70 @@ if not GEMINI_API_KEY:
     import streamlit as st
     st.error("GEMINI_API_KEY is not set! Please create a .env file in the project root with your API key. Example: GEMINI_API_KEY=your_key_here")
     st.stop()
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key=" + GEMINI_API_KEY
+# All Gemini calls go through the shared pooled client from registry.get_gemini_client()
+# Stream AI recommendations section by section; set GEMINI_STREAMING=0 to wait for the full answer
+GEMINI_STREAMING = os.getenv("GEMINI_STREAMING", "1") != "0"
+# Upper bound on simultaneous Gemini requests from one recommendations panel
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+RECOMMENDATION_SECTIONS = ["overview", "lifestyle", "diet", "medical", "prevention"]
+# Part of the recommendation cache key; bump it whenever the prompt below changes
+RECOMMENDATIONS_PROMPT_VERSION = "1"
 
-def get_gemini_recommendations(disease_name):
-    prompt = f"""
+def _recommendations_prompt(disease_name):
+    return f"""
     Write recommendations for a patient diagnosed with: {disease_name}.
     Use sections: overview (short summary), lifestyle (habits), diet (recommended and to avoid foods, vitamins/minerals), medical (basic advice and therapy), prevention (prevention tips).
     Respond in English. Format the answer as JSON with keys: overview, lifestyle, diet, medical, prevention.
     Keep the answer concise and practical for a patient.
     """
-    data = {
-        "contents": [{"parts": [{"text": prompt}]}]
-    }
+
+def _summarize(text):
+    """Ask Gemini for a short summary of an overly long section, keeping the text on failure"""
+    prompt = f"Summarize the following medical recommendations in English, keep it short and practical for a patient:\n{text}"
+    try:
+        return registry.get_gemini_client().generate_text(prompt)
+    except Exception:
+        return text
+
+def _is_too_long(value):
+    """Return True if _shorten_section would summarize this section"""
+    if isinstance(value, str):
+        return len(value) > 1200
+    if isinstance(value, list):
+        return sum(len(str(x)) for x in value) > 1200
+    if isinstance(value, dict):
+        return any(isinstance(v, (str, list)) and _is_too_long(v) for v in value.values())
+    return False
+
+def _shorten_section(value):
+    """Summarize a section (or the entries of a dict section) that is too long to show"""
+    if isinstance(value, str) and len(value) > 1200:
+        return _summarize(value)
+    if isinstance(value, list) and sum(len(str(x)) for x in value) > 1200:
+        return [_summarize(' '.join(str(x) for x in value))]
+    if isinstance(value, dict):
+        for subk in list(value.keys()):
+            subv = value[subk]
+            if isinstance(subv, str) and len(subv) > 1200:
+                value[subk] = _summarize(subv)
+            elif isinstance(subv, list) and sum(len(str(x)) for x in subv) > 1200:
+                value[subk] = [_summarize(' '.join(str(x) for x in subv))]
+    return value
+
+def _shorten_sections(recs, executor=None):
+    """Summarize the sections of recs that are too long, concurrently when an executor is given"""
+    long_sections = [k for k, v in recs.items() if _is_too_long(v)]
+    if executor is None or len(long_sections) < 2:
+        for k in long_sections:
+            recs[k] = _shorten_section(recs[k])
+    else:
+        for k, v in zip(long_sections, executor.map(_shorten_section, [recs[k] for k in long_sections])):
+            recs[k] = v
+    return recs
+
+def get_gemini_recommendations(disease_name, executor=None):
     try:
-        response = requests.post(GEMINI_API_URL, json=data, timeout=20)
-        response.raise_for_status()
-        text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
+        text = registry.get_gemini_client().generate_text(_recommendations_prompt(disease_name))
         import json as _json
         # Try to parse JSON from the response
         try:
@@ -46,44 +88,170 @@ def get_gemini_recommendations(disease_name):
             else:
                 recs = {"overview": text}
         # If the answer is too long, summarize it
-        def summarize(text):
-            prompt = f"Summarize the following medical recommendations in English, keep it short and practical for a patient:\n{text}"
-            data = {"contents": [{"parts": [{"text": prompt}]}]}
+        return _shorten_sections(recs, executor)
+    except Exception as e:
+        return {"overview": f"AI error: {str(e)}"}
+
+def _is_complete(recs):
+    """Only answers with every section are cached, never errors or cut-off streams"""
+    return (bool(recs) and all(name in recs for name in RECOMMENDATION_SECTIONS)
+            and not str(recs.get("overview", "")).startswith("AI error:"))
+
+def stream_gemini_recommendations(disease_name):
+    """Yield (section, value) pairs of the AI recommendations as soon as each section is complete
+
+    Sections are yielded as generated; long ones still need _shorten_section.
+    An error before the first section is yielded as the overview; an error
+    after it (for example a stream that breaks off) is raised, so the caller
+    knows the answer is incomplete.
+    """
+    from gemini_stream import stream_sections
+    found = False
+    try:
+        for section, value in stream_sections(registry.get_gemini_client(), _recommendations_prompt(disease_name)):
+            found = True
+            yield section, value
+    except Exception as e:
+        if found:
+            raise
+        yield "overview", f"AI error: {str(e)}"
+
+def _generate_recommendations(disease, cache, summary_pool, results):
+    """Worker: put (disease, section, value) items for one disease on results, then (disease, None, None)"""
+    recs = {}
+    generated = []
+    def create():
+        # Runs only while this worker holds the cache lease for the disease
+        generated.append(True)
+        if GEMINI_STREAMING:
+            summaries = []
+            def shorten_and_put(section_name, section):
+                recs[section_name] = _shorten_section(section)
+                results.put((disease, section_name, recs[section_name]))
             try:
-                resp = requests.post(GEMINI_API_URL, json=data, timeout=20)
-                resp.raise_for_status()
-                return resp.json()["candidates"][0]["content"]["parts"][0]["text"]
-            except Exception:
-                return text
-        for k in list(recs.keys()):
-            v = recs[k]
-            if isinstance(v, str) and len(v) > 1200:
-                recs[k] = summarize(v)
-            elif isinstance(v, list) and sum(len(str(x)) for x in v) > 1200:
-                recs[k] = [summarize(' '.join(str(x) for x in v))]
-            elif isinstance(v, dict):
-                for subk in list(v.keys()):
-                    subv = v[subk]
-                    if isinstance(subv, str) and len(subv) > 1200:
-                        v[subk] = summarize(subv)
-                    elif isinstance(subv, list) and sum(len(str(x)) for x in subv) > 1200:
-                        v[subk] = [summarize(' '.join(str(x) for x in subv))]
+                for section_name, section in stream_gemini_recommendations(disease):
+                    if _is_too_long(section):
+                        # Summarized while the rest of the answer keeps streaming
+                        summaries.append(summary_pool.submit(shorten_and_put, section_name, section))
+                    else:
+                        recs[section_name] = section
+                        results.put((disease, section_name, section))
+            finally:
+                for summary in summaries:
+                    summary.result()
+        else:
+            recs.update(get_gemini_recommendations(disease, summary_pool))
+            for section_name, section in recs.items():
+                results.put((disease, section_name, section))
         return recs
+    try:
+        # Inside the try, so a client that cannot be built still ends with the sentinel
+        key = (disease, RECOMMENDATIONS_PROMPT_VERSION, registry.get_gemini_client().model)
+        value = cache.get_or_create(*key, create, cacheable=_is_complete)
+        if not generated:
+            # A cached answer, possibly generated meanwhile by another session or process
+            for section_name, section in value.items():
+                results.put((disease, section_name, section))
     except Exception as e:
-        return {"overview": f"AI error: {str(e)}"}
+        if not recs:
+            results.put((disease, "overview", f"AI error: {str(e)}"))
+        else:
+            # The sections already shown stay; the missing ones show the error
+            for section_name in RECOMMENDATION_SECTIONS:
+                if section_name not in recs:
+                    results.put((disease, section_name, e))
+    finally:
+        results.put((disease, None, None))
+
+def iter_ai_recommendations(diseases, cache):
+    """Generate recommendations for several diseases concurrently
+
+    Yields (disease, section, value) in arrival order and (disease, None, None)
+    when a disease is finished. value is an exception for a section that could
+    not be generated. The requests and their follow-up summaries
+    run on bounded thread pools, while the caller renders on the script
+    thread, where Streamlit elements must be created.
+    """
+    import queue
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    diseases = list(dict.fromkeys(diseases))
+    if not diseases:
+        return
+    results = queue.Queue()
+    request_pool = ThreadPoolExecutor(max_workers=min(len(diseases), GEMINI_MAX_CONCURRENCY))
+    summary_pool = ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY)
+    running = [len(diseases)]
+    lock = threading.Lock()
+    def request_done(future):
+        # The workers still submit summaries after a rerun closes this generator,
+        # so the summary pool is shut down only once the last of them is done
+        with lock:
+            running[0] -= 1
+            last = running[0] == 0
+        if last:
+            summary_pool.shutdown(wait=False)
+    try:
+        for disease in diseases:
+            request_pool.submit(_generate_recommendations, disease, cache, summary_pool,
+                                results).add_done_callback(request_done)
+        remaining = len(diseases)
+        while remaining:
+            item = results.get()
+            if item[1] is None:
+                remaining -= 1
+            yield item
+    finally:
+        # On a rerun the workers finish in the background and still fill the cache
+        request_pool.shutdown(wait=False)
 
 class DiseaseDetectorApp:
     def __init__(self):
-        self.data_processor = DataProcessor()
-        self.model = DiseasePredictor()
-        self.chat_diagnosis = DiagnosisChat()
-        self.diagnostic_test = DiagnosticTest(self.data_processor, self.model)
-        self.health_knowledge = HealthKnowledgeBase()
+        # Heavy components are shared across all sessions through the registry.
+        # They load in the background while the user fills in the profile form,
+        # and the properties below wait for that instead of loading them again.
+        registry.start_warmup()
+        self._chat_diagnosis = None
+        self._diagnostic_test = None
+        
+    @property
+    def data_processor(self):
+        return registry.get_data_processor()
+        
+    @property
+    def model(self):
+        return registry.get_predictor()
+        
+    @property
+    def health_knowledge(self):
+        return registry.get_knowledge_base()
+        
+    @property
+    def model_store(self):
+        return registry.get_model_store()
+        
+    @property
+    def symptom_index(self):
+        return registry.get_symptom_index()
+        
+    @property
+    def chat_diagnosis(self):
+        if self._chat_diagnosis is None:
+            from chat_diagnosis import DiagnosisChat
+            self._chat_diagnosis = DiagnosisChat(self.data_processor, self.model, app=self)
+        return self._chat_diagnosis
+        
+    @property
+    def diagnostic_test(self):
+        if self._diagnostic_test is None:
+            from diagnostic_test import DiagnosticTest
+            self._diagnostic_test = DiagnosticTest(self.data_processor, self.model, app=self)
+        return self._diagnostic_test
         
     def train_model(self):
-        """Train the model with all available data"""
-        X, y = self.data_processor.load_data()
-        self.model.train(X, y)
+        """Make sure the shared model is loaded, fitting it only if no artifact exists"""
+        if not self.model.is_trained():
+            self.model_store.load_or_train(self.data_processor, self.model)
         
     def collect_user_profile(self):
         st.header("👤 Personal Information")
@@ -171,6 +339,11 @@ class DiseaseDetectorApp:
                 st.session_state["active_tab"] = None
                 st.rerun()
 
+        # Every mode needs the model; normally the warm-up finished during the profile form
+        if not registry.is_ready():
+            with st.spinner("Loading the prediction model..."):
+                registry.wait_until_ready()
+
         # Show only the selected mode
         if st.session_state["active_tab"] == "Symptom Checker":
             self.run_symptom_checker()
@@ -244,6 +417,13 @@ class DiseaseDetectorApp:
             st.error("No symptoms found in the dataset.")
             return
 
+        # Map the category entries to dataset columns ("diarrhea" -> "diarrhoea"); names with no column are left out
+        encoder = self.data_processor.get_encoder()
+        symptom_categories = {
+            category: [encoder.resolve(symptom) for symptom in symptoms if encoder.resolve(symptom)]
+            for category, symptoms in symptom_categories.items()
+        }
+
         search = st.text_input("Search symptoms:").strip().lower()
         # Pripremi ključeve za sve checkboxove
         for category, symptoms in symptom_categories.items():
@@ -286,12 +466,12 @@ class DiseaseDetectorApp:
                 st.info(f"Lifestyle factors you selected: {', '.join(user_profile['lifestyle'])}")
             if not emergency:
                 self.train_model()
-                input_data = self.data_processor.prepare_input(selected_symptoms)
-                predictions = self.model.predict(input_data)
+                input_data, unknown_symptoms = self.data_processor.prepare_input(selected_symptoms)
+                if unknown_symptoms:
+                    st.caption(f"Not recognized and left out of the analysis: {', '.join(map(str, unknown_symptoms))}")
                 top_n = min(3, len(self.data_processor.label_encoder.classes_))
-                top_indices = np.argsort(predictions[0])[-top_n:][::-1]
+                top_indices, top_probabilities = self.model.predict_top_k(input_data, top_n)
                 top_diseases = self.data_processor.label_encoder.inverse_transform(top_indices)
-                top_probabilities = predictions[0][top_indices]
                 # Dodatna upozorenja za kronične bolesti
                 if user_profile.get("chronic"):
                     for chronic in user_profile["chronic"]:
@@ -300,21 +480,8 @@ class DiseaseDetectorApp:
                 st.subheader("🔍 Analysis Results")
                 st.success("Analysis complete! Here are the potential conditions based on your symptoms.")
 
-                fig, ax = plt.subplots(figsize=(10, 5))
-                y_pos = np.arange(len(top_diseases))
-                probs_percentage = [p * 100 for p in top_probabilities]
-                bars = ax.barh(y_pos, probs_percentage, align='center')
-                ax.set_yticks(y_pos)
-                ax.set_yticklabels([f"{disease}" for disease in top_diseases])
-                ax.invert_yaxis()
-                ax.set_title('Potential Conditions')
-                for i, bar in enumerate(bars):
-                    width = bar.get_width()
-                    label_position = width + 1
-                    ax.text(label_position, bar.get_y() + bar.get_height()/2, f'{probs_percentage[i]:.1f}%', va='center')
-                ax.set_xlim(0, 115)
-                plt.xlabel('Probability (%)')
-                st.pyplot(fig)
+                import charts
+                charts.show_probability_chart(top_diseases, top_probabilities)
 
                 st.subheader("🔍 Detailed Analysis")
                 col_left, col_right = st.columns([1, 1])
@@ -330,8 +497,9 @@ class DiseaseDetectorApp:
                         disease_info = self.data_processor.get_disease_info(disease)
                         with st.expander("Learn more about this condition"):
                             st.write(disease_info)
-                            st.write(f"**Selected symptoms**: {', '.join([s.replace('_', ' ').title() for s in selected_symptoms])}")
+                            self.show_disease_symptoms(disease, selected_symptoms)
                         st.write("---")
+                self.show_similar_cases(input_data, selected_symptoms)
                 st.warning("""
                 ⚠️ **IMPORTANT DISCLAIMER:**
                 - This is an AI prediction only and does NOT replace professional medical diagnosis
@@ -341,6 +509,35 @@ class DiseaseDetectorApp:
                 self.show_recommendations_and_pdf(selected_symptoms, top_diseases, top_probabilities)
                 self.show_ai_recommendations_panel(top_diseases)
 
+    def show_disease_symptoms(self, disease, selected_symptoms):
+        """Show the disease's characteristic symptoms and which of the user's symptoms match"""
+        profile = self.symptom_index.disease_profile(disease)
+        characteristic = list(profile)[:8]
+        if characteristic:
+            st.write(f"**Characteristic symptoms**: {', '.join([s.replace('_', ' ').title() for s in characteristic])}")
+        matching = [s for s in selected_symptoms if s in profile]
+        if matching:
+            st.write(f"**Your matching symptoms**: {', '.join([s.replace('_', ' ').title() for s in matching])}")
+        elif profile:
+            st.write("**Your matching symptoms**: none of the symptoms recorded for this condition")
+
+    def show_similar_cases(self, input_data, selected_symptoms, k=5):
+        """List the recorded cases whose symptoms are closest to the user's"""
+        case_store = registry.get_case_store()
+        rows = []
+        for case in case_store.nearest(input_data, k):
+            symptoms = case_store.case_symptoms(case['row'])
+            shared = [s for s in symptoms if s in selected_symptoms]
+            rows.append({
+                "Diagnosis": case['diagnosis'],
+                "Similarity": f"{(1 - case['distance']) * 100:.0f}%",
+                "Shared symptoms": ', '.join([s.replace('_', ' ').title() for s in shared]) or "-",
+                "Other symptoms": len(symptoms) - len(shared)
+            })
+        if rows:
+            st.subheader("🗂️ Similar Past Cases")
+            st.table(rows)
+
     def show_ai_recommendations_panel(self, top_diseases):
         import re
         def is_croatian(text):
@@ -350,20 +547,35 @@ class DiseaseDetectorApp:
             if not isinstance(text, str):
                 return text
             return re.sub(r'<[^>]+>', '', text)
-        def gemini_translate(text):
-            prompt = f"Please translate this to English (medical context, keep it concise):\n{clean_html(text)}"
-            data = {"contents": [{"parts": [{"text": prompt}]}]}
-            try:
-                response = requests.post(GEMINI_API_URL, json=data, timeout=20)
-                response.raise_for_status()
-                return response.json()["candidates"][0]["content"]["parts"][0]["text"]
-            except Exception:
-                return clean_html(text)
+        translations = {}
         def translate_if_needed(text):
             t = clean_html(text)
-            if is_croatian(t):
-                return gemini_translate(t)
-            return t
+            return translations.get(t, t) if isinstance(t, str) else t
+        def section_texts(section):
+            """Yield every text render_section passes to translate_if_needed"""
+            if isinstance(section, str):
+                yield section
+            elif isinstance(section, list):
+                yield from section
+            elif isinstance(section, dict):
+                for key, value in section.items():
+                    yield str(key).replace('_', ' ').title()
+                    if isinstance(value, list):
+                        yield from value
+                    elif isinstance(value, dict):
+                        for subkey, subval in value.items():
+                            yield str(subkey)
+                            yield str(subval)
+                    else:
+                        yield value
+            elif section is not None:
+                yield str(section)
+        def prepare_translations(sections):
+            """Translate every Croatian text in these sections with one batched, cached request"""
+            texts = (clean_html(text) for section in sections for text in section_texts(section))
+            pending = [t for t in texts if is_croatian(t) and t not in translations]
+            if pending:
+                translations.update(registry.get_translator().translate_all(pending))
         def render_section(title, section):
             st.write(f"**{title}:**")
             if section is None:
@@ -387,19 +599,38 @@ class DiseaseDetectorApp:
             else:
                 st.write(translate_if_needed(str(section)))
         with st.expander("💡 AI Recommendations for Your Diagnoses", expanded=True):
+            placeholders = {}
+            known = {disease: self.health_knowledge.recommendations.get(disease, {}) for disease in top_diseases}
+            prepare_translations(recs[name] for recs in known.values() for name in RECOMMENDATION_SECTIONS if name in recs)
             for disease in top_diseases:
                 st.markdown(f"### 🦠 {disease}")
-                recs = self.health_knowledge.recommendations.get(disease, {})
-                if not recs:
-                    with st.spinner(f"Generating AI recommendations for {disease}..."):
-                        recs = get_gemini_recommendations(disease)
+                recs = known[disease]
                 if recs:
-                    for section_name in ["overview", "lifestyle", "diet", "medical", "prevention"]:
+                    for section_name in RECOMMENDATION_SECTIONS:
                         if section_name in recs:
                             render_section(section_name.capitalize(), recs[section_name])
                 else:
-                    st.info("No recommendations available for this condition.")
+                    # One placeholder per section keeps the order fixed while sections arrive
+                    placeholders[disease] = {name: st.empty() for name in RECOMMENDATION_SECTIONS}
+                    placeholders[disease][None] = st.empty()
+                    placeholders[disease][None].caption(f"Generating AI recommendations for {disease}...")
                 st.markdown("---")
+            # Every missing disease is requested at once; sections appear as they arrive
+            received = set()
+            for disease, section_name, section in iter_ai_recommendations(placeholders, registry.get_recommendation_cache()):
+                slots = placeholders[disease]
+                if section_name is None:
+                    if disease in received:
+                        slots[None].empty()
+                    else:
+                        slots[None].info("No recommendations available for this condition.")
+                elif isinstance(section, Exception):
+                    slots[section_name].error(f"{section_name.capitalize()}: AI error: {str(section)}")
+                elif section_name in slots:
+                    received.add(disease)
+                    prepare_translations([section])
+                    with slots[section_name].container():
+                        render_section(section_name.capitalize(), section)
 
     def show_recommendations_and_pdf(self, selected_symptoms, top_diseases, top_probabilities):
         """Prikazuje PDF download gumb za dijagnoze (preporuke su sada u posebnom panelu)"""
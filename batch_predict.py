@@ -0,0 +1,149 @@
+"""Score many symptom sets at once from the command line.
+
+Reads cases from a CSV or JSONL file in chunks and writes the top-k diseases for
+each case, so large intake histories never have to fit in memory at once.
+
+CSV input either has a ``symptoms`` column (symptoms separated by ``;``) or one
+0/1 column per symptom, like ``dataset/Testing.csv``. JSONL input has one object
+per line with a ``symptoms`` list. An optional ``id`` field is copied to the output.
+
+Usage:
+    python batch_predict.py cases.csv -o results.jsonl --top-k 3 --chunk-size 1000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import registry
+
+def _read_csv_cases(file, vocabulary):
+    """Yield (case_id, symptoms) pairs from a CSV file"""
+    reader = csv.DictReader(file)
+    symptom_columns = [c for c in (reader.fieldnames or []) if c in vocabulary]
+    for line_number, row in enumerate(reader, start=1):
+        case_id = row.get('id') or str(line_number)
+        if 'symptoms' in row:
+            symptoms = [s.strip() for s in (row['symptoms'] or '').split(';') if s.strip()]
+        else:
+            symptoms = [c for c in symptom_columns if row[c] and row[c].strip() not in ('0', '')]
+        yield case_id, symptoms
+
+def _read_jsonl_cases(file):
+    """Yield (case_id, symptoms) pairs from a JSONL file"""
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if isinstance(record, list):
+            yield str(line_number), record
+        else:
+            yield str(record.get('id', line_number)), record.get('symptoms', [])
+
+def iter_cases(path, vocabulary):
+    """Yield (case_id, symptoms) pairs from a CSV or JSONL file ('-' reads JSONL from stdin)"""
+    if path == '-':
+        yield from _read_jsonl_cases(sys.stdin)
+        return
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            yield from _read_csv_cases(file, vocabulary)
+        else:
+            yield from _read_jsonl_cases(file)
+
+def iter_chunks(cases, chunk_size):
+    """Group an iterable of cases into lists of at most chunk_size items"""
+    chunk = []
+    for case in cases:
+        chunk.append(case)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def predict_cases(data_processor, model, cases, top_k=3):
+    """Score one chunk of (case_id, symptoms) pairs and return result dictionaries"""
+    input_data, unknown = data_processor.prepare_batch([symptoms for _, symptoms in cases])
+    top_indices, top_probabilities = model.predict_batch(input_data, top_k=top_k)
+    classes = data_processor.label_encoder.classes_
+    unknown_by_row = {}
+    for row, symptom in unknown:
+        unknown_by_row.setdefault(row, []).append(symptom)
+    results = []
+    for row, ((case_id, _), indices, probabilities) in enumerate(zip(cases, top_indices, top_probabilities)):
+        result = {
+            'id': case_id,
+            'predictions': [
+                {'disease': str(classes[i]), 'probability': round(float(p), 6)}
+                for i, p in zip(indices, probabilities)
+            ]
+        }
+        if row in unknown_by_row:
+            # Symptoms that matched no dataset column and were not scored
+            result['unknown_symptoms'] = unknown_by_row[row]
+        results.append(result)
+    return results
+
+class _ResultWriter:
+    """Writes results as JSONL, or as CSV when the output path ends in .csv"""
+
+    def __init__(self, file, as_csv, top_k):
+        self.file = file
+        self.top_k = top_k
+        self.writer = None
+        if as_csv:
+            header = ['id']
+            for rank in range(1, top_k + 1):
+                header += [f'disease_{rank}', f'probability_{rank}']
+            header.append('unknown_symptoms')
+            self.writer = csv.writer(file)
+            self.writer.writerow(header)
+
+    def write(self, results):
+        for result in results:
+            if self.writer is None:
+                self.file.write(json.dumps(result) + '\n')
+            else:
+                row = [result['id']]
+                for prediction in result['predictions']:
+                    row += [prediction['disease'], prediction['probability']]
+                # Keep the unknown symptoms column aligned when a case has fewer predictions
+                row += [''] * (1 + 2 * self.top_k - len(row))
+                row.append(';'.join(result.get('unknown_symptoms', [])))
+                self.writer.writerow(row)
+        self.file.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV or JSONL file of symptom sets.")
+    parser.add_argument('input', help="CSV or JSONL file with cases ('-' reads JSONL from stdin)")
+    parser.add_argument('-o', '--output', default='-', help="output file (.jsonl or .csv), default stdout")
+    parser.add_argument('--top-k', type=int, default=3, help="number of diseases to return per case")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="number of cases scored per pass")
+    args = parser.parse_args(argv)
+
+    data_processor = registry.get_data_processor()
+    model = registry.get_predictor()
+    top_k = min(args.top_k, len(data_processor.label_encoder.classes_))
+
+    as_csv = args.output.lower().endswith('.csv')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        writer = _ResultWriter(output, as_csv, top_k)
+        total = 0
+        with_unknown = 0
+        for chunk in iter_chunks(iter_cases(args.input, set(data_processor.symptoms)), args.chunk_size):
+            results = predict_cases(data_processor, model, chunk, top_k=top_k)
+            writer.write(results)
+            total += len(chunk)
+            with_unknown += sum(1 for result in results if 'unknown_symptoms' in result)
+        print(f"Scored {total} cases", file=sys.stderr)
+        if with_unknown:
+            print(f"{with_unknown} cases had unknown symptoms that were not scored", file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == "__main__":
+    main()
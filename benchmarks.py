@@ -0,0 +1,199 @@
+"""Micro-benchmarks for the prediction and text-processing hot paths.
+
+Usage:
+    python benchmarks.py            # run every benchmark
+    python benchmarks.py forest     # run only the named benchmark
+"""
+import argparse
+import time
+import numpy as np
+
+def _time_per_call(func, repeats):
+    """Return per-call latencies in microseconds"""
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+def _report(name, timings):
+    print(f"  {name:<28} p50 {np.percentile(timings, 50):>10.1f} us   p99 {np.percentile(timings, 99):>10.1f} us")
+
+def _random_queries(n_rows, n_features, seed=0, min_symptoms=2, max_symptoms=6):
+    """Build sparse 0/1 query rows like the ones the app produces"""
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n_rows, n_features))
+    for row in range(n_rows):
+        count = rng.integers(min_symptoms, max_symptoms + 1)
+        X[row, rng.choice(n_features, size=count, replace=False)] = 1
+    return X
+
+def bench_forest(repeats=300):
+    """Single-row latency of sklearn predict_proba versus the compiled forest"""
+    from compiled_forest import CompiledForest
+    from data_processor import DataProcessor
+    from model import DiseasePredictor
+    from model_store import ModelStore
+
+    data_processor = DataProcessor()
+    predictor = DiseasePredictor()
+    ModelStore().load_or_train(data_processor, predictor)
+    compiled = CompiledForest.from_sklearn(predictor.model)
+
+    X = _random_queries(1000, len(data_processor.symptoms))
+    max_error = np.abs(compiled.predict_proba(X) - predictor.model.predict_proba(X)).max()
+    print(f"forest: {len(predictor.model.estimators_)} trees, {len(compiled.feature)} nodes, "
+          f"max |compiled - sklearn| = {max_error:.2e}")
+
+    row = X[:1]
+    _report("sklearn predict_proba", _time_per_call(lambda: predictor.model.predict_proba(row), repeats))
+    _report("compiled predict_proba", _time_per_call(lambda: compiled.predict_proba(row), repeats))
+
+    batch = X[:100]
+    sklearn_batch = _time_per_call(lambda: predictor.model.predict_proba(batch), repeats // 10) / len(batch)
+    compiled_batch = _time_per_call(lambda: compiled.predict_proba(batch), repeats // 10) / len(batch)
+    _report("sklearn per row (x100)", sklearn_batch)
+    _report("compiled per row (x100)", compiled_batch)
+
+def bench_cases(repeats=300, n_cases=1000000):
+    """Nearest-case lookup over a synthetic case base built from perturbed dataset rows"""
+    from case_store import CaseStore
+    from data_processor import DataProcessor
+
+    data_processor = DataProcessor()
+    X, y = data_processor.load_data()
+    rng = np.random.default_rng(0)
+    source = rng.integers(0, len(X), n_cases)
+    cases = np.asarray(X)[source] != 0
+    # Drop some recorded symptoms and add a few stray ones, so most cases differ
+    cases = (cases & (rng.random(cases.shape) >= 0.15)) | (rng.random(cases.shape) < 0.005)
+    start = time.perf_counter()
+    store = CaseStore(cases, data_processor.label_encoder.classes_[y[source]], data_processor.symptoms)
+    print(f"cases: {len(store)} rows, {len(store.patterns)} distinct vectors, "
+          f"built in {time.perf_counter() - start:.2f} s")
+
+    # Queries made of three symptoms of one real case, and unrelated random symptoms
+    related = np.zeros((repeats, len(data_processor.symptoms)))
+    for row, case in enumerate(rng.integers(0, len(X), repeats)):
+        present = np.flatnonzero(np.asarray(X)[case])
+        related[row, rng.choice(present, size=min(3, len(present)), replace=False)] = 1
+    unrelated = _random_queries(repeats, len(data_processor.symptoms), min_symptoms=2, max_symptoms=5)
+    for label, queries in (('related', related), ('random', unrelated)):
+        for metric in CaseStore.METRICS:
+            index = iter(range(repeats))
+            _report(f"nearest 5 {metric} ({label})",
+                    _time_per_call(lambda: store.nearest(queries[next(index)], 5, metric), repeats))
+
+_SAMPLE_DESCRIPTION = (
+    "For the last three days I have been feeling really tired, with no energy at all and a sore throat. "
+    "Last night I had a high fever and kept coughing; this morning there was a red rash on my arms and I "
+    "could not stop scratching. My back hurts, I feel sick after meals, and I'm worried it is getting worse. "
+)
+
+def bench_keywords(repeats=200):
+    """Chat symptom detection on long pasted descriptions: per-keyword substring scan versus the automaton"""
+    from keyword_matcher import KeywordAutomaton
+    from chat_diagnosis import DiagnosisChat
+    from data_processor import DataProcessor
+
+    # Placeholders keep DiagnosisChat from loading the shared model
+    chat_keywords = DiagnosisChat(data_processor=object(), model=object()).symptom_keywords
+    # A larger table: the chat keywords plus every dataset symptom name
+    data_processor = DataProcessor()
+    large_keywords = {symptom: list(phrases) for symptom, phrases in chat_keywords.items()}
+    for symptom in data_processor.get_all_symptoms():
+        large_keywords.setdefault(symptom, []).append(symptom.replace('_', ' '))
+
+    for label, keywords in (('chat', chat_keywords), ('chat + dataset', large_keywords)):
+        phrases = [(phrase, symptom) for symptom, symptom_phrases in keywords.items() for phrase in symptom_phrases]
+
+        def substring_scan(text):
+            text = text.lower()
+            return {symptom for symptom, symptom_phrases in keywords.items() if any(p in text for p in symptom_phrases)}
+
+        start = time.perf_counter()
+        automaton = KeywordAutomaton(phrases)
+        print(f"keywords ({label}): {len(phrases)} phrases, automaton built in "
+              f"{(time.perf_counter() - start) * 1e3:.2f} ms")
+        for copies in (1, 10, 100):
+            text = _SAMPLE_DESCRIPTION * copies
+            _report(f"substring scan ({len(text)} chars)", _time_per_call(lambda: substring_scan(text), repeats))
+            _report(f"automaton ({len(text)} chars)", _time_per_call(lambda: automaton.find_values(text), repeats))
+
+_MISSPELLED_MESSAGES = [
+    "I have had diarhea since yesterday and I feel nausia after every meal",
+    "breathlesness when I climb stairs and a bad headach in the evening",
+    "my stomache pain is terrible and there is some constipaton too",
+    "persistant sneezing, a runny nose and difficulty breething at night",
+]
+
+def bench_fuzzy(repeats=200):
+    """Typo-tolerant symptom matching: per-message latency and growth with the vocabulary"""
+    from chat_diagnosis import DiagnosisChat
+    from data_processor import DataProcessor
+    from fuzzy_matcher import TrigramIndex, symptom_terms
+
+    data_processor = DataProcessor()
+    chat_keywords = DiagnosisChat(data_processor=object(), model=object()).symptom_keywords
+    entries = symptom_terms(chat_keywords, data_processor.get_all_symptoms(), data_processor.symptom_descriptions)
+    # Synthetic variants of the real terms stand in for a much larger vocabulary
+    rng = np.random.default_rng(0)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    synthetic = [(term + ''.join(rng.choice(letters, 3)), value) for term, value in entries for _ in range(40)]
+
+    for label, vocabulary in (('dataset', entries), ('dataset x40', entries + synthetic)):
+        start = time.perf_counter()
+        index = TrigramIndex(vocabulary)
+        build_ms = (time.perf_counter() - start) * 1e3
+        print(f"fuzzy ({label}): {len(index.terms)} terms, built in {build_ms:.1f} ms")
+        found = index.find_values(_MISSPELLED_MESSAGES[0])
+        print(f"  example: {_MISSPELLED_MESSAGES[0]!r} -> {sorted(found)}")
+
+        messages = iter(range(repeats))
+        def uncached():
+            index._cache.clear()
+            index.find_values(_MISSPELLED_MESSAGES[next(messages) % len(_MISSPELLED_MESSAGES)])
+        _report("per message (cold cache)", _time_per_call(uncached, repeats))
+        messages = iter(range(repeats))
+        _report("per message (warm cache)", _time_per_call(
+            lambda: index.find_values(_MISSPELLED_MESSAGES[next(messages) % len(_MISSPELLED_MESSAGES)]), repeats))
+        text = _SAMPLE_DESCRIPTION * 10
+        index._cache.clear()
+        _report(f"pasted text ({len(text)} chars, cold)", _time_per_call(lambda: (index._cache.clear(), index.find_values(text)), 20))
+
+def bench_charts(repeats=50):
+    """Probability chart rendering: matplotlib PNG uncached and cached, and the HTML renderer"""
+    import charts
+    import matplotlib.pyplot as plt
+
+    diseases = ['Fungal infection', 'Drug Reaction', 'Acne']
+    probabilities = [0.62, 0.21, 0.07]
+    _report("matplotlib PNG (uncached)", _time_per_call(
+        lambda: charts.render_probability_png(diseases, probabilities), repeats))
+    charts.get_probability_png(diseases, probabilities)
+    _report("matplotlib PNG (cached)", _time_per_call(
+        lambda: charts.get_probability_png(diseases, probabilities), repeats))
+    _report("HTML bars", _time_per_call(lambda: charts.probability_bars_html(diseases, probabilities), repeats))
+    print(f"  open pyplot figures after rendering: {len(plt.get_fignums())}, cache: {charts.cache_stats()}")
+
+BENCHMARKS = {
+    'forest': bench_forest,
+    'cases': bench_cases,
+    'keywords': bench_keywords,
+    'fuzzy': bench_fuzzy,
+    'charts': bench_charts,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run prediction micro-benchmarks.")
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    for name in args.names or list(BENCHMARKS):
+        BENCHMARKS[name]()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import numpy as np
+
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0f0f0f0f0f0f0f0f)
+_H01 = np.uint64(0x0101010101010101)
+
+def _popcount_swar(words):
+    """Count set bits in every uint64 with the classic SWAR bit tricks"""
+    words = words - ((words >> np.uint64(1)) & _M1)
+    words = (words & _M2) + ((words >> np.uint64(2)) & _M2)
+    words = (words + (words >> np.uint64(4))) & _M4
+    return (words * _H01) >> np.uint64(56)
+
+# np.bitwise_count (NumPy 2.0+) maps to the hardware popcount instruction
+popcount = getattr(np, 'bitwise_count', _popcount_swar)
+
+def pack_symptoms(X, n_words):
+    """Pack 0/1 symptom rows into n_words uint64 words per row"""
+    packed = np.packbits(np.asarray(X) != 0, axis=1)
+    words = np.zeros((packed.shape[0], n_words * 8), dtype=np.uint8)
+    words[:, :packed.shape[1]] = packed
+    return words.view(np.uint64)
+
+class CaseStore:
+    """Training cases as bit-packed symptom vectors with popcount nearest-case search.
+
+    Each case takes one bit per symptom (132 symptoms fit in three uint64
+    words). Identical symptom vectors are stored once with the rows that share
+    them, sorted into buckets by their number of symptoms. A query scans the
+    buckets from the best possible distance down with vectorized popcounts and
+    stops once no remaining bucket can beat the k-th best case found, using the
+    size bounds of Jaccard and Hamming distance.
+    """
+
+    METRICS = ('jaccard', 'hamming')
+
+    def __init__(self, X, labels, symptoms):
+        self.symptoms = list(symptoms)
+        self.n_words = (len(self.symptoms) + 63) // 64
+        self.labels = np.asarray(labels, dtype=object)
+        patterns, inverse, counts = np.unique(pack_symptoms(X, self.n_words), axis=0,
+                                              return_inverse=True, return_counts=True)
+        bits = popcount(patterns).sum(axis=1, dtype=np.int64)
+        order = np.argsort(bits, kind='stable')
+        self.patterns = np.ascontiguousarray(patterns[order])
+        self.pattern_bits = bits[order]
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        self._row_pattern = rank[inverse.ravel()]
+        # Rows grouped by pattern: rows of pattern p are _pattern_rows[_starts[p]:_starts[p + 1]]
+        self._pattern_rows = np.argsort(self._row_pattern, kind='stable')
+        self._starts = np.concatenate([[0], np.cumsum(counts[order])])
+        # Patterns with n symptoms are patterns[_bucket_starts[n]:_bucket_starts[n + 1]]
+        self._bucket_starts = np.searchsorted(self.pattern_bits, np.arange(len(self.symptoms) + 2))
+
+    @classmethod
+    def from_data_processor(cls, data_processor):
+        """Build the store from the training data of a DataProcessor"""
+        X, y = data_processor.load_data()
+        if len(X) == 0:
+            raise ValueError("Could not load training data. Please check the dataset files.")
+        return cls(X, data_processor.label_encoder.inverse_transform(y), data_processor.symptoms)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _pack_query(self, query):
+        return pack_symptoms(np.asarray(query).reshape(1, -1), self.n_words)[0]
+
+    def _distances(self, start, end, query_words, query_bits, metric):
+        patterns = self.patterns[start:end]
+        if metric == 'hamming':
+            return popcount(patterns ^ query_words).sum(axis=1, dtype=np.int64).astype(np.float64)
+        # Only the words where the query has symptoms can contribute to the intersection
+        active = np.flatnonzero(query_words)
+        if len(active) == 0:
+            return np.ones(end - start)
+        shared = popcount(patterns[:, active] & query_words[active]).sum(axis=1, dtype=np.int64)
+        union = self.pattern_bits[start:end] + query_bits - shared
+        return 1.0 - shared / np.maximum(union, 1)
+
+    def _lower_bounds(self, query_bits, metric):
+        """Return the smallest possible distance to a pattern with n symptoms, for every n"""
+        sizes = np.arange(len(self._bucket_starts) - 1)
+        if metric == 'hamming':
+            return np.abs(sizes - query_bits).astype(np.float64)
+        if query_bits == 0:
+            return np.ones(len(sizes))
+        return 1.0 - np.minimum(sizes, query_bits) / np.maximum(sizes, query_bits)
+
+    def distances(self, query, metric='jaccard'):
+        """Return the distance from an encoded query row to every distinct stored vector"""
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        query_words = self._pack_query(query)
+        return self._distances(0, len(self.patterns), query_words, int(popcount(query_words).sum()), metric)
+
+    def nearest(self, query, k=5, metric='jaccard'):
+        """Return up to k closest cases as dicts with row, diagnosis and distance"""
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        query_words = self._pack_query(query)
+        query_bits = int(popcount(query_words).sum())
+        lower_bounds = self._lower_bounds(query_bits, metric)
+        best_patterns = np.empty(0, dtype=np.int64)
+        best_distances = np.empty(0)
+        for size in np.argsort(lower_bounds, kind='stable'):
+            # Every pattern holds at least one row, so k patterns cover the k closest rows
+            if len(best_patterns) >= k and lower_bounds[size] > best_distances[-1]:
+                break
+            start, end = self._bucket_starts[size], self._bucket_starts[size + 1]
+            if start == end:
+                continue
+            distances = self._distances(start, end, query_words, query_bits, metric)
+            if len(distances) > k:
+                keep = np.argpartition(distances, k - 1)[:k]
+                candidates, candidate_distances = keep + start, distances[keep]
+            else:
+                candidates, candidate_distances = np.arange(start, end), distances
+            best_patterns = np.concatenate([best_patterns, candidates])
+            best_distances = np.concatenate([best_distances, candidate_distances])
+            order = np.lexsort((best_patterns, best_distances))[:k]
+            best_patterns, best_distances = best_patterns[order], best_distances[order]
+
+        results = []
+        for pattern, distance in zip(best_patterns, best_distances):
+            for row in self._pattern_rows[self._starts[pattern]:self._starts[pattern + 1]]:
+                if len(results) == k:
+                    return results
+                results.append({'row': int(row), 'diagnosis': str(self.labels[row]), 'distance': float(distance)})
+        return results
+
+    def case_symptoms(self, row):
+        """Return the symptom names recorded for a stored case"""
+        bits = np.unpackbits(self.patterns[self._row_pattern[row]].view(np.uint8))[:len(self.symptoms)]
+        return [self.symptoms[i] for i in np.flatnonzero(bits)]
@@ -0,0 +1,112 @@
+import html
+import io
+import os
+import threading
+from collections import OrderedDict
+
+# "matplotlib" renders a PNG on the server; "html" draws the bars with plain HTML/CSS
+DEFAULT_RENDERER = os.getenv("CHART_RENDERER", "matplotlib")
+
+class ChartCache:
+    """Bounded LRU cache of rendered chart images, keyed by diseases and probabilities"""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(diseases, probabilities):
+        # Rounded to the precision shown on the chart labels
+        return tuple(str(d) for d in diseases), tuple(round(float(p) * 100, 1) for p in probabilities)
+
+    def get(self, key):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        with self._lock:
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+_cache = ChartCache()
+
+def render_probability_png(diseases, probabilities):
+    """Render the horizontal probability bar chart as PNG bytes"""
+    # A bare Figure is never registered with pyplot, so nothing accumulates in its
+    # global figure list; its artists are released as soon as the image is saved
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 5))
+    try:
+        ax = fig.subplots()
+        probs_percentage = [float(p) * 100 for p in probabilities]
+        y_pos = list(range(len(diseases)))
+        bars = ax.barh(y_pos, probs_percentage, align='center')
+        ax.set_yticks(y_pos)
+        ax.set_yticklabels([f"{disease}" for disease in diseases])
+        ax.invert_yaxis()
+        ax.set_title('Potential Conditions')
+        for i, bar in enumerate(bars):
+            width = bar.get_width()
+            ax.text(width + 1, bar.get_y() + bar.get_height() / 2, f'{probs_percentage[i]:.1f}%', va='center')
+        ax.set_xlim(0, 115)
+        ax.set_xlabel('Probability (%)')
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight')
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+def get_probability_png(diseases, probabilities):
+    """Return the cached PNG for these diseases and probabilities, rendering it on a miss"""
+    key = _cache.make_key(diseases, probabilities)
+    image = _cache.get(key)
+    if image is None:
+        image = render_probability_png(diseases, probabilities)
+        _cache.put(key, image)
+    return image
+
+def probability_bars_html(diseases, probabilities):
+    """Build the bar chart as HTML, rendered by the browser without matplotlib"""
+    rows = []
+    for disease, probability in zip(diseases, probabilities):
+        percentage = float(probability) * 100
+        rows.append(
+            '<div style="display:flex;align-items:center;margin:4px 0">'
+            f'<div style="width:35%;padding-right:8px;text-align:right">{html.escape(str(disease))}</div>'
+            '<div style="flex:1;background:#eee;border-radius:3px">'
+            f'<div style="width:{min(percentage, 100):.1f}%;background:#1f77b4;height:18px;border-radius:3px"></div>'
+            '</div>'
+            f'<div style="width:60px;padding-left:8px">{percentage:.1f}%</div>'
+            '</div>'
+        )
+    return '<div><b>Potential Conditions</b>' + ''.join(rows) + '</div>'
+
+def show_probability_chart(diseases, probabilities, renderer=None):
+    """Display the probability bar chart in Streamlit with the chosen renderer"""
+    import streamlit as st
+
+    renderer = renderer or DEFAULT_RENDERER
+    if renderer == "html":
+        st.markdown(probability_bars_html(diseases, probabilities), unsafe_allow_html=True)
+    else:
+        st.image(get_probability_png(diseases, probabilities), use_column_width=True)
+
+def cache_stats():
+    """Return size, hits and misses of the shared chart cache"""
+    return _cache.stats()
@@ -1,14 +1,14 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import os
-from data_processor import DataProcessor
-from model import DiseasePredictor
+import registry
+from keyword_matcher import compile_keywords
+from fuzzy_matcher import compile_terms, symptom_terms
 
 class DiagnosisChat:
-    def __init__(self):
-        self.data_processor = DataProcessor()
-        self.model = DiseasePredictor()
+    def __init__(self, data_processor=None, model=None, app=None):
+        # Default to the process-wide shared components
+        self.data_processor = data_processor if data_processor is not None else registry.get_data_processor()
+        self.model = model if model is not None else registry.get_predictor()
+        self.app = app
         self.symptom_questions = {
             "general": "Could you describe what symptoms you're experiencing?",
             "pain": "Are you experiencing any pain? If so, where and how severe?",
@@ -45,6 +45,27 @@ class DiagnosisChat:
             "neck_pain": ["neck pain", "sore neck", "stiff neck", "neck ache"],
             "back_pain": ["back pain", "sore back", "back ache", "back hurts", "back problem"]
         }
+        # All keywords compiled into one automaton, built once per process
+        self.keyword_automaton = compile_keywords(self.symptom_keywords)
+        # Trigram Dice similarity a misspelled word needs before its edit distance is checked
+        self.fuzzy_min_similarity = 0.45
+        self._fuzzy_index = None
+        # Chat history limits: messages shown per rerun, messages added by "Load earlier",
+        # messages kept in full, and older messages kept (shortened) in the archive
+        self.history_window = 20
+        self.history_page = 20
+        self.max_live_messages = 40
+        self.max_archived_messages = 100
+        self.archived_message_chars = 500
+        
+    @property
+    def fuzzy_index(self):
+        """Trigram index over symptom names, keywords and descriptions, built once per process"""
+        if self._fuzzy_index is None:
+            entries = symptom_terms(self.symptom_keywords, self.data_processor.get_all_symptoms(),
+                                    self.data_processor.symptom_descriptions)
+            self._fuzzy_index = compile_terms(entries, self.fuzzy_min_similarity)
+        return self._fuzzy_index
         
     def initialize_chat(self):
         """Initialize chat history and other session state variables"""
@@ -70,6 +91,15 @@ class DiagnosisChat:
         if 'last_message' not in st.session_state:
             st.session_state.last_message = ""
             
+        if 'chat_archive' not in st.session_state:
+            st.session_state.chat_archive = []
+            
+        if 'chat_summary' not in st.session_state:
+            st.session_state.chat_summary = {"compacted": 0, "dropped": 0, "symptoms": []}
+            
+        if 'chat_visible' not in st.session_state:
+            st.session_state.chat_visible = self.history_window
+            
     def _add_message(self, sender, message, role):
         """Add a message to the chat history"""
         st.session_state.chat_history.append({
@@ -77,6 +107,34 @@ class DiagnosisChat:
             "message": message,
             "role": role
         })
+        if role == "user":
+            # A new turn scrolls back to the latest messages
+            st.session_state.chat_visible = self.history_window
+        if len(st.session_state.chat_history) > self.max_live_messages:
+            self._compact_history()
+            
+    def _compact_history(self):
+        """Move older messages into the capped archive and summarize them"""
+        history = st.session_state.chat_history
+        # Compact down to one window at a time, so this runs once every few turns
+        older = history[:-self.history_window]
+        st.session_state.chat_history = history[-self.history_window:]
+        
+        archive = st.session_state.get('chat_archive', [])
+        for message in older:
+            text = message["message"]
+            if len(text) > self.archived_message_chars:
+                text = text[:self.archived_message_chars].rstrip() + "…"
+            archive.append(dict(message, message=text))
+        summary = st.session_state.get('chat_summary', {"compacted": 0, "dropped": 0, "symptoms": []})
+        overflow = len(archive) - self.max_archived_messages
+        if overflow > 0:
+            del archive[:overflow]
+            summary["dropped"] += overflow
+        summary["compacted"] += len(older)
+        summary["symptoms"] = sorted(st.session_state.get('detected_symptoms', set()))
+        st.session_state.chat_archive = archive
+        st.session_state.chat_summary = summary
         
     def detect_symptoms(self, user_input):
         """Detect symptoms from user input based on keywords"""
@@ -85,13 +143,15 @@ class DiagnosisChat:
         # Track if we found any symptoms in this message
         found_symptoms_in_message = False
         
-        # Check for each symptom's keywords in the user input
-        for symptom, keywords in self.symptom_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in user_input:
-                    st.session_state.detected_symptoms.add(symptom)
-                    found_symptoms_in_message = True
-                    break
+        # Find every symptom keyword (whole words only) in one pass over the input
+        for symptom in self.keyword_automaton.find_values(user_input):
+            st.session_state.detected_symptoms.add(symptom)
+            found_symptoms_in_message = True
+            
+        # Misspelled or unlisted symptom names ("diarhea", "breathlesness")
+        for symptom in self.fuzzy_index.find_values(user_input, self.keyword_automaton.vocabulary):
+            st.session_state.detected_symptoms.add(symptom)
+            found_symptoms_in_message = True
         
         # Smart detection for back pain
         if "back" in user_input and ("pain" in user_input or "hurt" in user_input or "ache" in user_input):
@@ -222,22 +282,15 @@ class DiagnosisChat:
             if len(symptoms_list) < 2 and not st.session_state.found_symptoms_in_message:
                 return "I've identified some symptoms, but I need a bit more information to make a proper assessment. Could you tell me more about what you're experiencing? Any other symptoms besides what you've already mentioned?"
                 
-            # Train model
-            X, y = self.data_processor.load_data()
-            self.model.train(X, y)
             label_encoder = self.data_processor.label_encoder
             
             # Prepare input based on detected symptoms
-            input_data = self.data_processor.prepare_input(symptoms_list)
-            
-            # Get prediction
-            predictions = self.model.predict(input_data)
+            input_data, unknown_symptoms = self.data_processor.prepare_input(symptoms_list)
             
             # Get top 3 predictions
             top_n = min(3, len(label_encoder.classes_))
-            top_indices = np.argsort(predictions[0])[-top_n:][::-1]
+            top_indices, top_probabilities = self.model.predict_top_k(input_data, top_n)
             top_diseases = label_encoder.inverse_transform(top_indices)
-            top_probabilities = predictions[0][top_indices]
             
             # Format results
             results = "Based on the symptoms you've described ("
@@ -254,6 +307,9 @@ class DiagnosisChat:
                 if disease_info != "No detailed information available for this condition.":
                     results += f"*{disease_info}*\n\n"
                 
+            if unknown_symptoms:
+                results += f"*Not used for this assessment (not in the model's symptom list): {', '.join(s.replace('_', ' ') for s in unknown_symptoms)}*\n\n"
+                
             results += "\nIMPORTANT: This is an AI-generated assessment and not a professional medical diagnosis. Please consult with a healthcare professional for proper evaluation and treatment."
             results += "\n\nIs there anything specific about these conditions you'd like to know more about?"
             
@@ -298,10 +354,30 @@ class DiagnosisChat:
         
         st.subheader("💬 AI Doctor Conversation")
         
+        history = st.session_state.chat_history
+        archive = st.session_state.chat_archive
+        summary = st.session_state.chat_summary
+        
+        # Only the last chat_visible messages are rendered on each rerun
+        visible = st.session_state.chat_visible
+        from_archive = max(0, min(visible - len(history), len(archive)))
+        messages = archive[len(archive) - from_archive:] + history[-visible:]
+        hidden = len(archive) + len(history) - len(messages)
+        
+        if summary["compacted"]:
+            symptoms = ", ".join(s.replace('_', ' ') for s in summary["symptoms"]) or "none yet"
+            st.caption(f"Earlier in this conversation ({summary['compacted']} messages): symptoms noted so far: {symptoms}.")
+        if hidden:
+            if st.button(f"Load earlier messages ({hidden} hidden)", key="load_earlier_messages"):
+                st.session_state.chat_visible = visible + self.history_page
+                st.rerun()
+        elif summary["dropped"]:
+            st.caption(f"{summary['dropped']} oldest messages are no longer stored.")
+        
         # Display chat messages in a container for better scrolling
         chat_container = st.container()
         with chat_container:
-            for message in st.session_state.chat_history:
+            for message in messages:
                 with st.chat_message(message["role"]):
                     st.markdown(message["message"])
                 
@@ -335,24 +411,25 @@ class DiagnosisChat:
             # Clear session state
             for key in ['chat_history', 'current_question', 'detected_symptoms', 
                       'conversation_stage', 'diagnosis_made', 'repetition_count',
-                      'last_message', 'found_symptoms_in_message']:
+                      'last_message', 'found_symptoms_in_message',
+                      'chat_archive', 'chat_summary', 'chat_visible']:
                 if key in st.session_state:
                     del st.session_state[key]
             st.rerun()
             
         # After chat, if diagnosis is made, show PDF and recommendations
         if st.session_state.get('diagnosis_made', False):
-            from app import DiseaseDetectorApp
-            app = DiseaseDetectorApp()
+            app = self.app
+            if app is None:
+                from app import DiseaseDetectorApp
+                app = DiseaseDetectorApp()
             detected_symptoms = list(st.session_state.get('detected_symptoms', []))
             # Recalculate diagnosis to get top diseases and probabilities
-            X, y = app.data_processor.load_data()
-            app.model.train(X, y)
-            input_data = app.data_processor.prepare_input(detected_symptoms)
-            predictions = app.model.predict(input_data)
-            top_n = min(3, len(app.data_processor.label_encoder.classes_))
-            top_indices = np.argsort(predictions[0])[-top_n:][::-1]
-            top_diseases = app.data_processor.label_encoder.inverse_transform(top_indices)
-            top_probabilities = predictions[0][top_indices]
+            input_data, unknown_symptoms = self.data_processor.prepare_input(detected_symptoms)
+            if unknown_symptoms:
+                st.caption(f"Not recognized and left out of the analysis: {', '.join(s.replace('_', ' ') for s in unknown_symptoms)}")
+            top_n = min(3, len(self.data_processor.label_encoder.classes_))
+            top_indices, top_probabilities = self.model.predict_top_k(input_data, top_n)
+            top_diseases = self.data_processor.label_encoder.inverse_transform(top_indices)
             app.show_recommendations_and_pdf(detected_symptoms, top_diseases, top_probabilities)
             app.show_ai_recommendations_panel(top_diseases)
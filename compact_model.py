@@ -0,0 +1,162 @@
+"""Compact, quantized on-disk format for the DiseasePredictor forest.
+
+Symptom features are 0/1 flags, so every split can be stored as a boolean test
+on a small integer feature id instead of a float64 threshold. Node ids use the
+narrowest unsigned type that fits, and leaf probabilities are quantized to
+uint8. Each table is a separate .npy file, so a replica can memory-map them
+and share the pages with other processes.
+
+Usage:
+    python compact_model.py export models/compact
+    python compact_model.py report models/compact
+"""
+import argparse
+import json
+import os
+import pickle
+import time
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+from compiled_forest import CompiledForest
+
+FORMAT_VERSION = 1
+_TABLES = ('feature', 'left', 'right', 'roots', 'value')
+
+def _index_dtype(size):
+    """Return the narrowest unsigned integer type that can hold indices below size"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if size - 1 <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+def quantize(compiled, levels=255):
+    """Build compact node tables from a float CompiledForest"""
+    n_nodes = len(compiled.feature)
+    node_ids = np.arange(n_nodes)
+    is_leaf = compiled.left == node_ids
+    internal_thresholds = compiled.threshold[~is_leaf]
+    if np.any((internal_thresholds <= 0.0) | (internal_thresholds >= 1.0)):
+        raise ValueError("The compact format needs 0/1 features with every split threshold between 0 and 1.")
+
+    # Internal nodes first, then leaves, so leaf values are stored without gaps
+    order = np.concatenate([node_ids[~is_leaf], node_ids[is_leaf]])
+    new_ids = np.empty(n_nodes, dtype=np.int64)
+    new_ids[order] = node_ids
+    leaf_offset = int((~is_leaf).sum())
+
+    index_dtype = _index_dtype(n_nodes)
+    tables = {
+        'feature': compiled.feature[order].astype(_index_dtype(compiled.n_features or int(compiled.feature.max()) + 1)),
+        'left': new_ids[compiled.left[order]].astype(index_dtype),
+        'right': new_ids[compiled.right[order]].astype(index_dtype),
+        'roots': new_ids[compiled.roots].astype(index_dtype),
+        'value': np.rint(compiled.value[order[leaf_offset:]] * levels).astype(np.uint8)
+    }
+    meta = {
+        'depth': int(compiled.depth),
+        'leaf_offset': leaf_offset,
+        'value_scale': 1.0 / levels,
+        'n_features': int(compiled.n_features) if compiled.n_features is not None else None
+    }
+    return tables, meta
+
+def save_compact(directory, compiled, classes, symptoms, version=None):
+    """Write a CompiledForest and its vocabulary in the compact format"""
+    tables, meta = quantize(compiled)
+    os.makedirs(directory, exist_ok=True)
+    for name in _TABLES:
+        np.save(os.path.join(directory, f'{name}.npy'), tables[name])
+    meta.update({
+        'format_version': FORMAT_VERSION,
+        'classes': [str(c) for c in classes],
+        'symptoms': list(symptoms),
+        'version': version
+    })
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as file:
+        json.dump(meta, file, indent=2)
+
+def load_compact(directory, mmap=True):
+    """Load a compact model, returning (CompiledForest, meta)"""
+    with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as file:
+        meta = json.load(file)
+    if meta.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact model format: {meta.get('format_version')}")
+    tables = {
+        name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None)
+        for name in _TABLES
+    }
+    compiled = CompiledForest(
+        feature=tables['feature'],
+        threshold=None,
+        left=tables['left'],
+        right=tables['right'],
+        value=tables['value'],
+        roots=np.asarray(tables['roots'], dtype=np.intp),
+        depth=meta['depth'],
+        value_scale=meta['value_scale'],
+        leaf_offset=meta['leaf_offset']
+    )
+    compiled.n_features = meta['n_features']
+    return compiled, meta
+
+def restore_compact(directory, data_processor, predictor, mmap=True):
+    """Load a compact model into a data processor and predictor for serving"""
+    compiled, meta = load_compact(directory, mmap=mmap)
+    label_encoder = LabelEncoder()
+    label_encoder.classes_ = np.array(meta['classes'], dtype=object)
+    data_processor.label_encoder = label_encoder
+    data_processor.symptoms = list(meta['symptoms'])
+    predictor.compiled = compiled
+    predictor.version = meta.get('version') or f"compact:{os.path.abspath(directory)}"
+    return predictor
+
+def _directory_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+def report(directory, data_processor, predictor):
+    """Print size, load time and accuracy of the compact model against the full forest"""
+    from model_tuning import _drop_symptoms
+
+    pickled = pickle.dumps(predictor.model, protocol=pickle.HIGHEST_PROTOCOL)
+    start = time.perf_counter()
+    pickle.loads(pickled)
+    pickle_load_ms = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    compact, _ = load_compact(directory)
+    compact_load_ms = (time.perf_counter() - start) * 1e3
+
+    X, y = data_processor.load_data()
+    queries = np.vstack([X, _drop_symptoms(X, np.random.default_rng(0))])
+    labels = np.concatenate([y, y])
+    full = predictor.model.predict_proba(queries)
+    quantized = compact.predict_proba(queries)
+
+    print(f"pickled forest:  {len(pickled) / 1024:>9.1f} KB   load {pickle_load_ms:>7.2f} ms")
+    print(f"compact model:   {_directory_size(directory) / 1024:>9.1f} KB   load {compact_load_ms:>7.2f} ms (memory-mapped)")
+    print(f"max |probability difference|: {np.abs(full - quantized).max():.4f}")
+    print(f"top-1 agreement with full forest: {np.mean(full.argmax(axis=1) == quantized.argmax(axis=1)):.3f}")
+    print(f"accuracy full / compact: {np.mean(full.argmax(axis=1) == labels):.3f} / "
+          f"{np.mean(quantized.argmax(axis=1) == labels):.3f}")
+
+def main(argv=None):
+    import registry
+    from data_processor import DataProcessor
+    from model import DiseasePredictor
+
+    parser = argparse.ArgumentParser(description="Export or inspect the compact model format.")
+    parser.add_argument('command', choices=['export', 'report'])
+    parser.add_argument('directory', nargs='?', default=os.path.join('models', 'compact'))
+    args = parser.parse_args(argv)
+
+    data_processor = DataProcessor()
+    predictor = DiseasePredictor()
+    registry.get_model_store().load_or_train(data_processor, predictor)
+    if args.command == 'export':
+        compiled = CompiledForest.from_sklearn(predictor.model)
+        save_compact(args.directory, compiled, data_processor.label_encoder.classes_,
+                     data_processor.symptoms, version=predictor.version)
+        print(f"Wrote compact model to {args.directory}")
+    report(args.directory, data_processor, predictor)
+
+if __name__ == "__main__":
+    main()
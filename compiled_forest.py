@@ -0,0 +1,91 @@
+import numpy as np
+
+class CompiledForest:
+    """Array-backed evaluator for a fitted RandomForestClassifier.
+
+    All trees are flattened into contiguous node tables (feature, threshold,
+    children, leaf probabilities) and evaluated together with vectorized
+    traversal, which avoids sklearn's per-call validation and per-tree dispatch.
+    The probabilities match RandomForestClassifier.predict_proba.
+
+    The tables may also come from the compact on-disk format (see compact_model):
+    threshold=None means boolean splits (a present symptom goes right), value may
+    hold quantized integers that are multiplied by value_scale, and value rows may
+    cover only the leaves, starting at node leaf_offset.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth,
+                 value_scale=1.0, leaf_offset=0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.value_scale = value_scale
+        self.leaf_offset = leaf_offset
+        self.n_features = None
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Flatten the estimators of a fitted forest into one set of node tables"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n_nodes)
+
+            # Leaves point to themselves and always go "left", so a fixed number
+            # of traversal steps leaves every row parked on its leaf.
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            proba = tree.value[:, 0, :].astype(np.float64)
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(proba / normalizer)
+
+            roots.append(offset)
+            depth = max(depth, tree.max_depth)
+            offset += n_nodes
+
+        compiled = cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.intp),
+            depth=depth
+        )
+        compiled.n_features = forest.n_features_in_
+        return compiled
+
+    def apply(self, X):
+        """Return the leaf node reached in every tree, shape (n_rows, n_trees)"""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.depth):
+            if self.threshold is None:
+                go_left = X[rows, self.feature[nodes]] < 0.5
+            else:
+                go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        """Average the leaf probabilities of all trees for every row of X"""
+        leaves = self.apply(X)
+        if self.leaf_offset:
+            leaves = leaves - self.leaf_offset
+        return self.value[leaves].mean(axis=1, dtype=np.float64) * self.value_scale
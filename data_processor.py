@@ -1,12 +1,19 @@
-import pandas as pd
 import numpy as np
 import os
+import json
 from sklearn.preprocessing import LabelEncoder
+from dataset_cache import DatasetCache
+from symptom_encoder import SymptomEncoder
 
 class DataProcessor:
     def __init__(self):
         self.label_encoder = LabelEncoder()
         self.symptoms = None
+        # Clinician-confirmed cases appended by feedback.FeedbackLog
+        self.confirmed_cases_path = os.path.join('dataset', 'confirmed_cases.jsonl')
+        # Compiled, memory-mapped copy of the dataset CSV
+        self.dataset_cache = DatasetCache()
+        self._encoder = None
         self.symptom_descriptions = {
             'itching': 'Itching of the skin',
             'skin_rash': 'Visible skin rash',
@@ -68,60 +75,110 @@ class DataProcessor:
             'Psoriasis': 'A skin condition causing red, flaky, crusty patches of skin covered with silvery scales.'
         }
         
+    def get_dataset_path(self):
+        """Return the path of the dataset that load_data() will read"""
+        # First try to use the larger Testing.csv dataset
+        dataset_path = os.path.join('dataset', 'Testing.csv')
+        
+        # If not available, fall back to smaller dataset
+        if not os.path.exists(dataset_path):
+            dataset_path = os.path.join('dataset', 'disease_dataset.csv')
+            if not os.path.exists(dataset_path):
+                raise FileNotFoundError(f"No dataset files found in the dataset directory")
+        return dataset_path
+        
+    def get_data_paths(self):
+        """Return every file that load_data() trains on"""
+        paths = [self.get_dataset_path()]
+        if os.path.exists(self.confirmed_cases_path):
+            paths.append(self.confirmed_cases_path)
+        return paths
+        
+    def load_confirmed_cases(self):
+        """Read confirmed (symptoms, diagnosis) pairs from the feedback log"""
+        cases = []
+        if not os.path.exists(self.confirmed_cases_path):
+            return cases
+        with open(self.confirmed_cases_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    cases.append((list(record['symptoms']), str(record['diagnosis'])))
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"Skipping invalid confirmed case: {str(e)}")
+        return cases
+        
     def load_data(self):
         """Load and preprocess the disease dataset"""
         try:
-            # First try to use the larger Testing.csv dataset
-            dataset_path = os.path.join('dataset', 'Testing.csv')
-            
-            # If not available, fall back to smaller dataset
-            if not os.path.exists(dataset_path):
-                dataset_path = os.path.join('dataset', 'disease_dataset.csv')
-                if not os.path.exists(dataset_path):
-                    raise FileNotFoundError(f"No dataset files found in the dataset directory")
+            dataset_path = self.get_dataset_path()
             
-            # Load data
-            data = pd.read_csv(dataset_path)
+            # The parsed dataset is served from the memory-mapped cache
+            dataset = self.dataset_cache.load(dataset_path)
             
-            if data.empty:
-                raise ValueError("Dataset is empty")
-                
             # Get list of all symptoms (all columns except prognosis)
-            self.symptoms = list(data.columns[:-1])
+            self.symptoms = list(dataset.symptoms)
+            X = dataset.X
             
-            # Separate features and target variable
-            X = data.drop('prognosis', axis=1)
-            y = data['prognosis']
+            # Append clinician-confirmed cases from the feedback log
+            confirmed = self.load_confirmed_cases()
+            if not confirmed:
+                # The cached codes already match LabelEncoder's sorted classes
+                self.label_encoder.classes_ = dataset.classes
+                return X, dataset.y
+                
+            # Same name resolution (aliases, normalized spellings) as user input
+            extra, unknown = self.get_encoder().encode_batch([symptoms for symptoms, _ in confirmed])
+            for row, symptom in unknown:
+                print(f"Unknown symptom in confirmed case {row + 1} ignored: {symptom}")
+            # A case with no known symptom at all would be an all-zero training row
+            keep = extra.any(axis=1)
+            if not keep.all():
+                print(f"Skipping {int((~keep).sum())} confirmed cases without any known symptom")
+            X = np.vstack([X, extra[keep]])
+            diagnoses = [diagnosis for (_, diagnosis), kept in zip(confirmed, keep) if kept]
+            y = np.concatenate([dataset.classes[dataset.y], diagnoses])
             
             # Encode disease labels
             y_encoded = self.label_encoder.fit_transform(y)
             
-            # Convert to numpy arrays
-            X = X.to_numpy()
-            
             return X, y_encoded
             
         except Exception as e:
             print(f"Error loading data: {str(e)}")
             return np.array([]), np.array([])
     
-    def prepare_input(self, symptoms):
-        """Prepare user input for model prediction"""
+    def get_encoder(self):
+        """Return the SymptomEncoder for the current symptom vocabulary"""
         if self.symptoms is None:
             self.load_data()
             
         if not self.symptoms:  # If symptoms list is empty
             raise ValueError("Could not load symptoms list. Please check the dataset files.")
             
-        # Create input array
-        input_data = np.zeros(len(self.symptoms))
+        # Rebuilt when the vocabulary changes, e.g. after a model is loaded or retrained
+        if self._encoder is None or self._encoder.symptoms != self.symptoms:
+            self._encoder = SymptomEncoder(self.symptoms)
+        return self._encoder
+    
+    def prepare_input(self, symptoms):
+        """Prepare user input for model prediction
         
-        # Set 1 for present symptoms
-        for symptom in symptoms:
-            if symptom in self.symptoms:
-                input_data[self.symptoms.index(symptom)] = 1
-                
-        return input_data.reshape(1, -1)
+        Returns (input_data, unknown) where unknown lists the symptoms that did
+        not match any column and were left out of the prediction.
+        """
+        return self.get_encoder().encode(symptoms)
+    
+    def prepare_batch(self, symptom_lists, sparse=False):
+        """Encode many symptom lists into one uint8 matrix (CSR when sparse=True)
+        
+        Returns (matrix, unknown) where unknown lists (row, symptom) pairs that
+        did not match any column.
+        """
+        return self.get_encoder().encode_batch(symptom_lists, sparse=sparse)
     
     def get_all_symptoms(self):
         """Return list of all possible symptoms"""
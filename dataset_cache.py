@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from streaming_loader import SymptomDataset, load_csv_chunked
+
+FORMAT_VERSION = 1
+
+class DatasetCache:
+    """Compiled, memory-mapped copies of symptom CSV files.
+
+    Each CSV is parsed once into X.npy (uint8 symptom flags), y.npy (label codes)
+    and meta.json (class names and symptom vocabulary). The arrays are opened
+    with mmap_mode='r', so loading takes milliseconds and every worker process
+    shares the same page cache. An entry is reused while the source file's size
+    and mtime are unchanged; when the mtime changes, the file is hashed and the
+    entry is rebuilt only if the content actually changed.
+    """
+
+    def __init__(self, cache_dir=os.path.join('models', 'dataset_cache')):
+        self.cache_dir = cache_dir
+
+    def _pointer_path(self, source_path):
+        name = hashlib.sha256(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    @staticmethod
+    def hash_file(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _write_pointer(self, source_path, pointer):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(pointer, file)
+            os.replace(tmp_path, self._pointer_path(source_path))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _read_pointer(self, source_path):
+        try:
+            with open(self._pointer_path(source_path), 'r', encoding='utf-8') as file:
+                pointer = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if pointer.get('format_version') != FORMAT_VERSION:
+            return None
+        return pointer
+
+    def _entry_dir(self, sha256):
+        return os.path.join(self.cache_dir, sha256[:32])
+
+    def _open(self, sha256):
+        directory = self._entry_dir(sha256)
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        return SymptomDataset(
+            X=np.load(os.path.join(directory, 'X.npy'), mmap_mode='r'),
+            y=np.load(os.path.join(directory, 'y.npy'), mmap_mode='r'),
+            classes=np.array(meta['classes'], dtype=object),
+            symptoms=list(meta['symptoms'])
+        )
+
+    def _build(self, source_path, sha256):
+        directory = self._entry_dir(sha256)
+        if os.path.isdir(directory):
+            return
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            # The CSV is streamed straight into the memory-mapped output file
+            X_path = os.path.join(tmp_dir, 'X.npy')
+            allocated_rows = []
+            def allocate(shape):
+                allocated_rows.append(shape[0])
+                return np.lib.format.open_memmap(X_path, mode='w+', dtype=np.uint8, shape=shape)
+            dataset = load_csv_chunked(source_path, allocate=allocate)
+            dataset.X.flush()
+            if len(dataset.X) < allocated_rows[0]:
+                # Blank lines were counted as rows; keep only the rows that were read
+                trimmed_path = os.path.join(tmp_dir, 'X_trimmed.npy')
+                np.save(trimmed_path, dataset.X)
+                os.replace(trimmed_path, X_path)
+            np.save(os.path.join(tmp_dir, 'y.npy'), dataset.y)
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as file:
+                json.dump({'classes': [str(c) for c in dataset.classes], 'symptoms': dataset.symptoms}, file)
+            # Renaming the finished directory publishes the entry in one step
+            os.rename(tmp_dir, directory)
+        except OSError:
+            # Another process published the same entry first
+            if not os.path.isdir(directory):
+                raise
+        finally:
+            if os.path.exists(tmp_dir):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def load(self, source_path):
+        """Return the memory-mapped dataset for source_path, compiling it when it is missing or stale"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        stat = os.stat(source_path)
+        pointer = self._read_pointer(source_path)
+        if pointer and pointer['size'] == stat.st_size and pointer['mtime_ns'] == stat.st_mtime_ns:
+            try:
+                return self._open(pointer['sha256'])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        # The mtime alone may change without new content (a checkout or a copy)
+        sha256 = self.hash_file(source_path)
+        previous = pointer['sha256'] if pointer else None
+        self._build(source_path, sha256)
+        self._write_pointer(source_path, {
+            'format_version': FORMAT_VERSION,
+            'source': os.path.abspath(source_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256
+        })
+        if previous and previous != sha256:
+            # Processes that still map the old arrays keep their pages until they close them
+            shutil.rmtree(self._entry_dir(previous), ignore_errors=True)
+        return self._open(sha256)
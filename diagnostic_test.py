@@ -1,13 +1,14 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
+import registry
 
 class DiagnosticTest:
     """Class to handle the guided diagnostic test functionality"""
     
-    def __init__(self, data_processor, model):
+    def __init__(self, data_processor, model, app=None):
         self.data_processor = data_processor
         self.model = model
+        self.app = app
         self.questions = {
             "general": {
                 "text": "Which general symptoms are you experiencing?",
@@ -163,47 +164,22 @@ class DiagnosticTest:
             # Prepare data for prediction
             try:
                 # Prepare input based on selected symptoms
-                input_data = self.data_processor.prepare_input(st.session_state.selected_symptoms)
-                
-                # Get prediction
-                predictions = self.model.predict(input_data)
+                input_data, unknown_symptoms = self.data_processor.prepare_input(st.session_state.selected_symptoms)
+                if unknown_symptoms:
+                    st.caption(f"Not recognized and left out of the analysis: {', '.join(map(str, unknown_symptoms))}")
                 
                 # Get top 3 predictions
                 top_n = min(3, len(self.data_processor.label_encoder.classes_))
-                top_indices = np.argsort(predictions[0])[-top_n:][::-1]
+                top_indices, top_probabilities = self.model.predict_top_k(input_data, top_n)
                 top_diseases = self.data_processor.label_encoder.inverse_transform(top_indices)
-                top_probabilities = predictions[0][top_indices]
                 
                 # Display results
                 st.subheader("🔍 Analysis Results")
                 st.success("Analysis complete! Here are the potential conditions based on your symptoms.")
                 
-                # Create a bar chart for visualization
-                import matplotlib.pyplot as plt
-                fig, ax = plt.subplots(figsize=(10, 5))
-                y_pos = np.arange(len(top_diseases))
-                
-                # Convert probabilities to percentages
-                probs_percentage = [p * 100 for p in top_probabilities]
-                
-                # Create horizontal bar chart
-                bars = ax.barh(y_pos, probs_percentage, align='center')
-                ax.set_yticks(y_pos)
-                ax.set_yticklabels([f"{disease}" for disease in top_diseases])
-                ax.invert_yaxis()  # Labels read top-to-bottom
-                ax.set_title('Potential Conditions')
-                
-                # Add percentage labels to the bars
-                for i, bar in enumerate(bars):
-                    width = bar.get_width()
-                    label_position = width + 1  # Position the label right after the bar
-                    ax.text(label_position, bar.get_y() + bar.get_height()/2, f'{probs_percentage[i]:.1f}%',
-                            va='center')
-                
-                # Set x-axis limit to allow space for percentage labels
-                ax.set_xlim(0, 115)  # Allow extra space for labels
-                plt.xlabel('Probability (%)')
-                st.pyplot(fig)
+                # Bar chart, cached by diseases and probabilities
+                import charts
+                charts.show_probability_chart(top_diseases, top_probabilities)
                 
                 # Show detailed results
                 st.subheader("🔍 Detailed Analysis")
@@ -228,7 +204,9 @@ class DiagnosticTest:
                         disease_info = self.data_processor.get_disease_info(disease)
                         with st.expander("Learn more about this condition"):
                             st.write(disease_info)
-                            st.write(f"**Common symptoms**: {', '.join([s.replace('_', ' ').title() for s in st.session_state.selected_symptoms])}")
+                            characteristic = registry.get_symptom_index().characteristic_symptoms(disease)
+                            if characteristic:
+                                st.write(f"**Common symptoms**: {', '.join([s.replace('_', ' ').title() for s in characteristic])}")
                         
                         st.write("---")
                 
@@ -239,8 +217,10 @@ class DiagnosticTest:
                 - Seek immediate medical attention for serious symptoms
                 """)
                 # === DODANO: Prikaz PDF gumba i AI preporuka ===
-                from app import DiseaseDetectorApp
-                app = DiseaseDetectorApp()
+                app = self.app
+                if app is None:
+                    from app import DiseaseDetectorApp
+                    app = DiseaseDetectorApp()
                 app.show_recommendations_and_pdf(
                     st.session_state.selected_symptoms,
                     top_diseases,
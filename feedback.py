@@ -0,0 +1,147 @@
+"""Feedback ingestion for clinician-confirmed cases.
+
+Confirmed (symptoms, diagnosis) pairs are appended to a JSONL log that
+DataProcessor.load_data() merges into the training data. IncrementalTrainer then
+grows the existing forest with a few warm-started trees instead of refitting it,
+and only refits from scratch every few updates or when a new diagnosis appears.
+
+Usage:
+    python feedback.py add "Allergy" continuous_sneezing chills
+    python feedback.py update
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import threading
+import registry
+from data_processor import DataProcessor
+from model import DiseasePredictor
+
+class FeedbackLog:
+    """Append-only log of clinician-confirmed cases"""
+
+    def __init__(self, path=None, data_processor=None):
+        self.data_processor = data_processor or DataProcessor()
+        self.path = path or self.data_processor.confirmed_cases_path
+        self._lock = threading.Lock()
+
+    def append(self, symptoms, diagnosis):
+        """Record one confirmed case, with its symptoms stored as dataset column names"""
+        diagnosis = str(diagnosis).strip()
+        if not symptoms:
+            raise ValueError("A confirmed case needs at least one symptom.")
+        if not diagnosis:
+            raise ValueError("A confirmed case needs a diagnosis.")
+        # Aliases and spelling variants resolve to their column; an unknown symptom
+        # would otherwise become an all-zero training row
+        encoder = self.data_processor.get_encoder()
+        resolved = [encoder.resolve(str(symptom)) for symptom in symptoms]
+        unknown = [str(symptom) for symptom, column in zip(symptoms, resolved) if column is None]
+        if unknown:
+            raise ValueError(f"Unknown symptoms: {', '.join(unknown)}")
+        symptoms = list(dict.fromkeys(resolved))
+        line = json.dumps({'symptoms': symptoms, 'diagnosis': diagnosis}) + '\n'
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._lock:
+            # One write in append mode keeps lines intact across processes
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(line)
+
+class IncrementalTrainer:
+    """Grows the forest with warm-started trees and schedules occasional full refits.
+
+    The new trees are fitted on the full training set (dataset plus confirmed
+    cases) because every tree in a scikit-learn forest must see all classes,
+    but only trees_per_update trees are built instead of the whole forest.
+    """
+
+    def __init__(self, store=None, trees_per_update=10, full_refit_every=5):
+        self.store = store or registry.get_model_store()
+        self.trees_per_update = trees_per_update
+        self.full_refit_every = full_refit_every
+
+    def needs_full_refit(self, data_processor, new_processor, predictor):
+        """Return True when warm-starting the current forest is not possible or not wanted"""
+        if list(new_processor.label_encoder.classes_) != list(data_processor.label_encoder.classes_):
+            # A new diagnosis changes the label encoding
+            return True
+        if list(new_processor.symptoms) != list(data_processor.symptoms):
+            return True
+        if not hasattr(predictor.model, 'estimators_'):
+            # A predictor restored from the compact format serves the compiled forest
+            # only; there are no fitted trees to warm-start from
+            return True
+        extra_trees = len(predictor.model.estimators_) - predictor.params['n_estimators']
+        return extra_trees + self.trees_per_update > self.trees_per_update * self.full_refit_every
+
+    def update(self, data_processor, predictor):
+        """Return a new (data_processor, predictor) pair trained on all confirmed cases"""
+        new_processor = DataProcessor()
+        key = self.store.make_key(new_processor.get_data_paths(), predictor.get_config())
+        if key == predictor.version:
+            # The predictor was already trained on exactly this data
+            return data_processor, predictor
+        X, y = new_processor.load_data()
+        if len(X) == 0:
+            raise ValueError("Could not load training data. Please check the dataset files.")
+
+        new_predictor = DiseasePredictor(**predictor.params, ensemble=predictor.ensemble)
+        if self.needs_full_refit(data_processor, new_processor, predictor):
+            new_predictor.train(X, y)
+        else:
+            # Work on a copy so the predictor serving requests is never modified
+            new_predictor.model = copy.deepcopy(predictor.model)
+            new_predictor.grow(X, y, self.trees_per_update)
+
+        new_predictor.version = key
+        self.store.save(key, {
+            'model': new_predictor.model,
+            'extra_models': new_predictor.extra_models,
+            'label_encoder': new_processor.label_encoder,
+            'symptoms': list(new_processor.symptoms)
+        })
+        return new_processor, new_predictor
+
+def apply_confirmed_cases(trainer=None):
+    """Update the shared model with the confirmed cases logged so far"""
+    trainer = trainer or IncrementalTrainer()
+    data_processor, predictor = trainer.update(registry.get_data_processor(), registry.get_predictor())
+    registry.swap_model(data_processor, predictor)
+    return predictor
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record confirmed cases and update the model.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add_parser = subparsers.add_parser('add', help="append a confirmed case to the log")
+    add_parser.add_argument('diagnosis')
+    add_parser.add_argument('symptoms', nargs='+')
+    update_parser = subparsers.add_parser('update', help="update the stored model with the logged cases")
+    update_parser.add_argument('--trees-per-update', type=int, default=10)
+    update_parser.add_argument('--full-refit-every', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == 'add':
+        try:
+            FeedbackLog().append(args.symptoms, args.diagnosis)
+        except ValueError as e:
+            print(f"Error recording confirmed case: {str(e)}")
+            return 1
+        print(f"Recorded confirmed case: {args.diagnosis}")
+    else:
+        trainer = IncrementalTrainer(trees_per_update=args.trees_per_update,
+                                     full_refit_every=args.full_refit_every)
+        artifact = trainer.store.load_latest()
+        if artifact is None:
+            predictor = apply_confirmed_cases(trainer)
+        else:
+            # Grow the last stored model rather than refitting one for the new data
+            data_processor = DataProcessor()
+            predictor = DiseasePredictor()
+            trainer.store.restore(artifact, data_processor, predictor)
+            data_processor, predictor = trainer.update(data_processor, predictor)
+        print(f"Model updated: {len(predictor.model.estimators_)} trees, version {predictor.version}")
+
+if __name__ == "__main__":
+    sys.exit(main())
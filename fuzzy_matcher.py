@@ -0,0 +1,168 @@
+import threading
+from collections import Counter
+from keyword_matcher import tokenize
+
+# Everyday words that sit within an edit or two of a symptom term ("could" ~ "cold")
+# and must never be corrected into one
+STOPWORDS = frozenset("""
+the and are was has had for not but you her his its our got all any can did lot now out
+about above after again against also always because been before being below between both
+cannot could doing down during each every feel feeling feels felt from further have having
+here into itself just later little maybe more most much only other over really since some
+still such than that their them then there these they thing think this those through today
+under until very were what when where which while with would your yours week weeks days
+""".split())
+
+def trigrams(term):
+    """Return the character trigrams of a term, padded so word starts and ends count"""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def bounded_edit_distance(a, b, max_edits):
+    """Return the Levenshtein distance between a and b, or None if it exceeds max_edits"""
+    if abs(len(a) - len(b)) > max_edits:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        # Only cells within max_edits of the diagonal can stay under the bound
+        low, high = max(1, i - max_edits), min(len(b), i + max_edits)
+        if low > 1:
+            current[low - 1] = max_edits + 1
+        for j in range(low, high + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != b[j - 1]))
+        if high < len(b):
+            current[high + 1:] = [max_edits + 1] * (len(b) - high)
+        if min(current[low - 1:high + 1]) > max_edits:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_edits else None
+
+class TrigramIndex:
+    """Typo-tolerant lookup of symptom terms through an inverted index of character trigrams.
+
+    A query only visits the terms that share a trigram with it and whose length
+    is within the edit bound. Candidates
+    whose trigram Dice similarity is below min_similarity are skipped before
+    the bounded edit distance is computed, so a lookup stays cheap as the
+    vocabulary grows. Terms of up to five letters must match exactly, six-letter
+    terms may differ by one edit and longer terms by two.
+    """
+
+    def __init__(self, entries, min_similarity=0.45, min_length=4, max_words=4, cache_size=4096):
+        """Index (term, value) pairs; terms may be multi-word phrases"""
+        self.min_similarity = min_similarity
+        self.min_length = min_length
+        self.cache_size = cache_size
+        self.terms = []
+        self.values = []
+        self.max_words = 1
+        self._postings = {}
+        self._gram_counts = []
+        self._cache = {}
+        self._lock = threading.Lock()
+        seen = set()
+        for term, value in entries:
+            term = ' '.join(tokenize(term))
+            if not term or (term, value) in seen or term.count(' ') >= max_words:
+                continue
+            seen.add((term, value))
+            term_id = len(self.terms)
+            self.terms.append(term)
+            self.values.append(value)
+            self.max_words = max(self.max_words, term.count(' ') + 1)
+            grams = trigrams(term)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                # Postings are split by term length, so a query only visits terms
+                # whose length is within its edit bound
+                self._postings.setdefault((gram, len(term)), []).append(term_id)
+
+    @staticmethod
+    def max_edits(term):
+        # Short words are only matched exactly: "scold" must not become "cold"
+        if len(term) <= 5:
+            return 0
+        return 1 if len(term) == 6 else 2
+
+    def lookup(self, query):
+        """Return [(value, term, edit distance)] for the closest terms to query, best first"""
+        query = ' '.join(tokenize(query))
+        cached = self._cache.get(query)
+        if cached is not None:
+            return cached
+        matches = []
+        if len(query) >= self.min_length:
+            grams = trigrams(query)
+            max_edits = self.max_edits(query)
+            lengths = range(len(query) - max_edits, len(query) + max_edits + 1)
+            shared = Counter()
+            for gram in grams:
+                for length in lengths:
+                    postings = self._postings.get((gram, length))
+                    if postings:
+                        shared.update(postings)
+            scored = []
+            for term_id, count in shared.items():
+                similarity = 2.0 * count / (len(grams) + self._gram_counts[term_id])
+                if similarity < self.min_similarity:
+                    continue
+                distance = bounded_edit_distance(query, self.terms[term_id], max_edits)
+                if distance is not None:
+                    scored.append((distance, -similarity, term_id))
+            scored.sort()
+            if scored:
+                best = scored[0][0]
+                matches = [(self.values[t], self.terms[t], d) for d, _, t in scored if d == best]
+        with self._lock:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[query] = matches
+        return matches
+
+    def find_values(self, text, known_words=()):
+        """Return {value: matched text} for misspelled terms in text
+
+        Runs of up to max_words words are tried, so phrases such as "stomache
+        pain" can be matched as well. Runs made only of known_words (for example
+        the exact keyword vocabulary, already handled by the caller) and runs
+        that start or end with a filler word are skipped.
+        """
+        words = tokenize(text)
+        filler = [len(word) < 3 or word in STOPWORDS for word in words]
+        found = {}
+        for size in range(1, self.max_words + 1):
+            for start in range(len(words) - size + 1):
+                end = start + size
+                if filler[start] or filler[end - 1]:
+                    continue
+                window = words[start:end]
+                if all(word in known_words for word in window):
+                    continue
+                phrase = ' '.join(window)
+                for value, _, _ in self.lookup(phrase):
+                    found.setdefault(value, phrase)
+        return found
+
+def symptom_terms(symptom_keywords, symptoms, descriptions):
+    """Build (term, symptom) pairs from chat keywords, dataset symptom names and descriptions"""
+    entries = [(phrase, symptom) for symptom, phrases in symptom_keywords.items() for phrase in phrases]
+    entries += [(symptom.replace('_', ' '), symptom) for symptom in symptoms]
+    # Whole descriptions ("Extreme tiredness"); single description words are too generic
+    entries += [(text, symptom) for symptom, text in descriptions.items()]
+    return entries
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+def compile_terms(entries, min_similarity=0.45):
+    """Return the shared TrigramIndex for a sequence of (term, value) pairs, building it only once"""
+    key = (tuple(entries), min_similarity)
+    index = _compiled.get(key)
+    if index is None:
+        with _compiled_lock:
+            index = _compiled.get(key)
+            if index is None:
+                index = TrigramIndex(key[0], min_similarity=min_similarity)
+                _compiled[key] = index
+    return index
@@ -0,0 +1,159 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+class GeminiError(Exception):
+    """Raised when a Gemini request fails after all retries"""
+
+class CallMetrics:
+    """Thread-safe per-method counters and recent latencies of Gemini calls"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._methods = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, seconds, error=None, retries=0):
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = {'calls': 0, 'errors': 0, 'retries': 0,
+                                                 'latencies': deque(maxlen=self.window), 'last_error': None}
+            stats['calls'] += 1
+            stats['retries'] += retries
+            stats['latencies'].append(seconds)
+            if error is not None:
+                stats['errors'] += 1
+                stats['last_error'] = error
+
+    def snapshot(self):
+        """Return {method: {calls, errors, retries, p50_ms, p95_ms, last_error}}"""
+        with self._lock:
+            report = {}
+            for method, stats in self._methods.items():
+                latencies = sorted(stats['latencies'])
+                report[method] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                    'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else None,
+                    'last_error': stats['last_error'],
+                }
+            return report
+
+class GeminiClient:
+    """Shared Gemini API client with a keep-alive connection pool, retries and metrics.
+
+    One requests.Session is reused by every call, so repeated requests skip
+    the TCP and TLS handshakes. The pool holds at most pool_size connections,
+    and callers beyond that wait for a free one. Responses with status 429 or
+    5xx and connection errors are retried with jittered exponential backoff,
+    honouring Retry-After when the server sends it.
+    """
+
+    def __init__(self, api_key, base_url="https://generativelanguage.googleapis.com/v1beta",
+                 model="gemini-2.0-flash", pool_size=8, max_retries=3, backoff_base=0.5,
+                 backoff_max=8.0, timeout=20):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.metrics = CallMetrics()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # The key travels in a header, so it never shows up in logged URLs or error messages
+        self.session.headers.update({'x-goog-api-key': api_key or ''})
+
+    @classmethod
+    def from_env(cls):
+        """Build a client from GEMINI_API_KEY, GEMINI_API_BASE, GEMINI_MODEL and GEMINI_POOL_SIZE"""
+        kwargs = {}
+        if os.getenv("GEMINI_API_BASE"):
+            kwargs['base_url'] = os.getenv("GEMINI_API_BASE")
+        if os.getenv("GEMINI_MODEL"):
+            kwargs['model'] = os.getenv("GEMINI_MODEL")
+        if os.getenv("GEMINI_POOL_SIZE"):
+            kwargs['pool_size'] = int(os.getenv("GEMINI_POOL_SIZE"))
+        return cls(os.getenv("GEMINI_API_KEY"), **kwargs)
+
+    def url(self, method):
+        return f"{self.base_url}/models/{self.model}:{method}"
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        # Full jitter spreads out the retries of concurrent callers
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def post(self, method, payload, stream=False, params=None, timeout=None):
+        """POST to a model method, retrying transient failures; return the successful response"""
+        start = time.perf_counter()
+        retries = 0
+        error = None
+        try:
+            while True:
+                response = None
+                try:
+                    response = self.session.post(self.url(method), json=payload, params=params,
+                                                 stream=stream, timeout=timeout or self.timeout)
+                    if response.status_code not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        return response
+                    failure = GeminiError(f"Gemini {method} returned HTTP {response.status_code}")
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    failure = GeminiError(f"Gemini {method} request failed: {str(e)}")
+                except requests.HTTPError as e:
+                    # Other 4xx errors (bad request, invalid key) will not succeed on retry
+                    raise GeminiError(f"Gemini {method} returned HTTP {e.response.status_code}") from e
+                if retries >= self.max_retries:
+                    raise failure
+                delay = self._backoff(retries, response)
+                if response is not None:
+                    response.close()
+                retries += 1
+                time.sleep(delay)
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.metrics.record(method, time.perf_counter() - start, error, retries)
+
+    def generate_text(self, prompt, timeout=None, generation_config=None):
+        """Return the text of a single generateContent answer
+
+        generation_config is passed through, e.g. to request JSON output that
+        follows a response schema.
+        """
+        data = {"contents": [{"parts": [{"text": prompt}]}]}
+        if generation_config:
+            data["generationConfig"] = generation_config
+        response = self.post('generateContent', data, timeout=timeout)
+        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+    def stream_text(self, prompt, timeout=None):
+        """Yield the text chunks of a streamGenerateContent answer as they arrive"""
+        from gemini_stream import iter_sse_text
+        data = {"contents": [{"parts": [{"text": prompt}]}]}
+        with self.post('streamGenerateContent', data, stream=True, params={'alt': 'sse'}, timeout=timeout) as response:
+            # SSE responses usually carry no charset, and the stream is UTF-8 JSON
+            response.encoding = response.encoding or 'utf-8'
+            for text in iter_sse_text(response):
+                yield text
+
+    def stats(self):
+        """Return the per-method call metrics"""
+        return self.metrics.snapshot()
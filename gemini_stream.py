@@ -0,0 +1,101 @@
+import json
+
+class SectionParser:
+    """Incremental parser that returns the members of a streamed JSON object as soon as each one is complete.
+
+    The model writes its answer as one JSON object, possibly wrapped in a
+    ```json fence. Text chunks are fed in as they arrive; the parser tracks
+    nesting depth and string state and hands back every top-level
+    (key, value) pair once its closing comma or brace has been seen, so
+    "overview" can be shown while "prevention" is still being generated.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.started = False
+        self.finished = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, text):
+        """Add a chunk of text and return the list of (key, value) members it completed"""
+        self.buffer += text
+        completed = []
+        buffer = self.buffer
+        while self._pos < len(buffer) and not self.finished:
+            char = buffer[self._pos]
+            if not self.started:
+                if char == '{':
+                    self.started = True
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete(buffer[self._member_start:self._pos], completed)
+                    self.finished = True
+            elif char == ',' and self._depth == 1:
+                self._complete(buffer[self._member_start:self._pos], completed)
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return completed
+
+    @staticmethod
+    def _complete(member, completed):
+        if not member.strip():
+            return
+        try:
+            completed.extend(json.loads('{' + member + '}').items())
+        except ValueError:
+            # A malformed member is skipped; the full text is still available in buffer
+            pass
+
+def iter_sse_text(response):
+    """Yield the text of every candidate part in a Gemini server-sent event stream"""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+        payload = line[len('data:'):].strip()
+        if not payload or payload == '[DONE]':
+            continue
+        event = json.loads(payload)
+        for candidate in event.get("candidates", [])[:1]:
+            for part in candidate.get("content", {}).get("parts", []):
+                if part.get("text"):
+                    yield part["text"]
+
+class IncompleteStreamError(Exception):
+    """Raised when a streamed answer ends before its JSON object is closed"""
+
+def stream_sections(client, prompt, timeout=None):
+    """Stream a prompt through a GeminiClient and yield (section, value) pairs as they complete
+
+    If the answer turns out not to be a JSON object, the whole text is yielded
+    as a single "overview" section when the stream ends. A JSON answer whose
+    stream stops before the closing brace raises IncompleteStreamError once the
+    sections received so far have been yielded.
+    """
+    parser = SectionParser()
+    found = False
+    for text in client.stream_text(prompt, timeout=timeout):
+        for section in parser.feed(text):
+            found = True
+            yield section
+    if parser.started and not parser.finished:
+        raise IncompleteStreamError("The answer stream ended before all sections were received")
+    if not found and parser.buffer.strip():
+        yield "overview", parser.buffer.strip()
@@ -0,0 +1,134 @@
+"""Local stand-in for the Gemini API, for trying the app without a key or network.
+
+Answers generateContent and streamGenerateContent (alt=sse) requests with a
+canned set of recommendations. The streaming answer is split into small chunks
+sent --delay seconds apart, so progressive rendering can be watched and timed.
+With --error-rate a share of requests fails with HTTP 503 to exercise retries,
+with --truncate the stream breaks off after that share of the answer, and with
+--long-sections two sections are long enough for the app to summarize them.
+Connections are kept alive (HTTP/1.1), like the real API.
+
+Usage:
+    python gemini_stub.py --port 8765 --delay 0.2
+    GEMINI_API_BASE=http://127.0.0.1:8765/v1beta streamlit run app.py
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_RECOMMENDATIONS = {
+    "overview": "This is a stub answer. Follow the advice of your doctor and rest while you recover.",
+    "lifestyle": ["Get enough sleep", "Avoid strenuous exercise until symptoms improve"],
+    "diet": {"recommended": ["Water", "Fresh fruit and vegetables"], "avoid": ["Alcohol"]},
+    "medical": ["See a doctor if symptoms get worse or last more than a few days"],
+    "prevention": ["Wash your hands regularly"]
+}
+
+def _recommendations(long_sections):
+    if not long_sections:
+        return CANNED_RECOMMENDATIONS
+    # Over the app's 1200 character limit, so they go through the summary pool
+    return dict(CANNED_RECOMMENDATIONS,
+                overview=" ".join([CANNED_RECOMMENDATIONS["overview"]] * 15),
+                prevention=CANNED_RECOMMENDATIONS["prevention"] * 50)
+
+def _response_body(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; without TCP_NODELAY a kept-alive
+    # connection stalls on delayed ACKs
+    disable_nagle_algorithm = True
+    delay = 0.2
+    chunk_size = 40
+    error_rate = 0.0
+    truncate = 0.0
+    long_sections = False
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def _send_body(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if random.random() < self.error_rate:
+            self._send_body(503, 'application/json', b'{"error": {"code": 503, "message": "stub overloaded"}}')
+            return
+        prompt = request.get("contents", [{}])[0].get("parts", [{}])[0].get("text", "")
+        if request.get("generationConfig", {}).get("responseMimeType") == "application/json":
+            # Batched translation: mark every string of the JSON array as translated
+            text = json.dumps([f"[EN] {item}" for item in json.loads(prompt.split("\n", 1)[-1])])
+        elif "translate" in prompt.lower() or "summarize" in prompt.lower():
+            text = prompt.split("\n", 1)[-1]
+        else:
+            text = "```json\n" + json.dumps(_recommendations(self.long_sections), indent=2) + "\n```"
+
+        if ':streamGenerateContent' in self.path:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            end = int(len(text) * self.truncate) if self.truncate else len(text)
+            for i in range(0, end, self.chunk_size):
+                event = json.dumps(_response_body(text[i:min(i + self.chunk_size, end)]))
+                data = f"data: {event}\r\n\r\n".encode('utf-8')
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+                time.sleep(self.delay)
+            if self.truncate:
+                # Drop the connection without the final chunk, like a network failure
+                self.close_connection = True
+                return
+            self.wfile.write(b"0\r\n\r\n")
+        elif ':generateContent' in self.path:
+            time.sleep(self.delay * (len(text) // self.chunk_size + 1))
+            body = json.dumps(_response_body(text)).encode('utf-8')
+            self._send_body(200, 'application/json; charset=UTF-8', body)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(port=8765, delay=0.2, chunk_size=40, error_rate=0.0, truncate=0.0, long_sections=False):
+    """Create the stub server; call serve_forever() on the result to run it
+
+    The handler class is available as server.RequestHandlerClass, and its
+    connections attribute counts the TCP connections accepted so far.
+    """
+    handler = type('ConfiguredStubHandler', (StubHandler,),
+                   {'delay': delay, 'chunk_size': chunk_size, 'error_rate': error_rate,
+                    'truncate': truncate, 'long_sections': long_sections, 'connections': 0})
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve canned Gemini API responses on localhost.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.2, help="seconds between streamed chunks")
+    parser.add_argument('--chunk-size', type=int, default=40, help="characters per streamed chunk")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with HTTP 503")
+    parser.add_argument('--truncate', type=float, default=0.0,
+                        help="break off every stream after this share of the answer (0 sends it all)")
+    parser.add_argument('--long-sections', action='store_true', help="answer with sections that need summarizing")
+    args = parser.parse_args(argv)
+    server = serve(args.port, args.delay, args.chunk_size, args.error_rate, args.truncate, args.long_sections)
+    print(f"Gemini stub listening on http://127.0.0.1:{args.port}/v1beta")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
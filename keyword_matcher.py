@@ -0,0 +1,109 @@
+import re
+import threading
+from collections import deque
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+def tokenize(text):
+    """Split text into lower-case word tokens, keeping contractions such as can't"""
+    return _TOKEN.findall(text.lower().replace('’', "'"))
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that finds many keyword phrases in one pass over a message.
+
+    The automaton runs over word tokens instead of characters, so a keyword only
+    matches whole words ("sick" does not match "homesick") and multi-word phrases
+    match across any spacing or punctuation. A plural "s"/"es" on a message word
+    is ignored when the singular is a keyword word, so "rashes" still finds "rash".
+    """
+
+    def __init__(self, keywords):
+        """Build the automaton from (phrase, value) pairs"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self.vocabulary = set()
+        for phrase, value in keywords:
+            words = tokenize(phrase)
+            if not words:
+                continue
+            state = 0
+            for word in words:
+                self.vocabulary.add(word)
+                next_state = self._goto[state].get(word)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][word] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            if (len(words), value) not in self._output[state]:
+                self._output[state].append((len(words), value))
+        self._link()
+        self._build_lookup()
+
+    def _link(self):
+        """Compute failure links breadth-first and merge the outputs along them"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(word, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _build_lookup(self):
+        """Map every keyword word and its plural forms to the keyword word"""
+        self._lookup = {}
+        for word in self.vocabulary:
+            for suffix in ('s', 'es'):
+                self._lookup.setdefault(word + suffix, word)
+        # Exact keyword words win over plural forms ("less" stays "less", not "les")
+        self._lookup.update((word, word) for word in self.vocabulary)
+
+    def _scan(self, words):
+        """Yield (first word index, last word index, value) for every keyword in a word list"""
+        lookup, goto, fail, output = self._lookup, self._goto, self._fail, self._output
+        # Words outside the keyword vocabulary send the automaton back to the root,
+        # so only the (usually few) keyword words are stepped through in Python
+        hits = [(i, lookup[word]) for i, word in enumerate(words) if word in lookup]
+        state = 0
+        previous = -2
+        for i, word in hits:
+            if i != previous + 1:
+                state = 0
+            previous = i
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for n_words, value in output[state]:
+                yield i - n_words + 1, i, value
+
+    def find_all(self, text):
+        """Return (start, end, value) for every keyword occurrence in text"""
+        tokens = list(_TOKEN.finditer(text.lower().replace('’', "'")))
+        return [(tokens[first].start(), tokens[last].end(), value)
+                for first, last, value in self._scan([token.group() for token in tokens])]
+
+    def find_values(self, text):
+        """Return the set of values whose keywords occur in text"""
+        return {value for _, _, value in self._scan(tokenize(text))}
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+def compile_keywords(keyword_map):
+    """Return the shared automaton for a {value: [phrases]} mapping, building it only once"""
+    key = tuple((value, tuple(phrases)) for value, phrases in keyword_map.items())
+    automaton = _compiled.get(key)
+    if automaton is None:
+        with _compiled_lock:
+            automaton = _compiled.get(key)
+            if automaton is None:
+                automaton = KeywordAutomaton((phrase, value) for value, phrases in keyword_map.items() for phrase in phrases)
+                _compiled[key] = automaton
+    return automaton
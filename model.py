@@ -1,19 +1,177 @@
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.naive_bayes import BernoulliNB
+from sklearn.neighbors import KNeighborsClassifier
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import time
 import numpy as np
+import uuid
+import warnings
+
+# Secondary models that can be blended with the forest, by name
+ENSEMBLE_MODELS = {
+    'naive_bayes': lambda: BernoulliNB(alpha=0.1),
+    'nearest_neighbors': lambda: KNeighborsClassifier(n_neighbors=3, metric='jaccard', weights='distance')
+}
+
+# Suggested blend weights; the forest itself always has weight 1.0.
+# Naive Bayes is available but lowered symptom-dropout accuracy on Testing.csv.
+DEFAULT_ENSEMBLE = {'nearest_neighbors': 0.5}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    """Return the thread pool shared by all predictors for scoring secondary models"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ensemble')
+        return _executor
 
 class DiseasePredictor:
-    def __init__(self):
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42,
-            class_weight='balanced'
-        )
-        
+    def __init__(self, n_estimators=100, max_depth=10, random_state=42, class_weight='balanced',
+                 ensemble=None, ensemble_timeout=0.01):
+        # Hyperparameters are kept so that stored artifacts can be keyed by them
+        self.params = {
+            'n_estimators': n_estimators,
+            'max_depth': max_depth,
+            'random_state': random_state,
+            'class_weight': class_weight
+        }
+        self.model = RandomForestClassifier(**self.params)
+        # Optional secondary models blended with the forest: name -> weight
+        self.ensemble = dict(ensemble or {})
+        self.extra_models = {}
+        # Seconds a prediction waits for secondary models before dropping them
+        self.ensemble_timeout = ensemble_timeout
+        self.ensemble_stats = {name: {'used': 0, 'dropped': 0} for name in self.ensemble}
+        # Optional array-backed inference engine, see compile()
+        self.compiled = None
+        # Optional PredictionCache; entries are tagged with the model version
+        self.cache = None
+        self.version = None
+
+    def get_config(self):
+        """Return the settings that determine the trained artifact"""
+        config = dict(self.params)
+        if self.ensemble:
+            config['ensemble'] = dict(self.ensemble)
+        return config
+
     def train(self, X, y):
         """Train the model on given data"""
         self.model.fit(X, y)
-        
+        self._fit_extra_models(X, y)
+        self.compiled = None
+        self.version = uuid.uuid4().hex
+
+    def _fit_extra_models(self, X, y):
+        """Fit the secondary ensemble models on the binary symptom matrix"""
+        X = np.asarray(X) != 0
+        self.extra_models = {}
+        for name in self.ensemble:
+            model = ENSEMBLE_MODELS[name]()
+            model.fit(X, y)
+            self.extra_models[name] = model
+
+    def grow(self, X, y, n_new_trees):
+        """Add n_new_trees warm-started trees fitted on X, y to the existing forest"""
+        self.model.set_params(warm_start=True, n_estimators=len(self.model.estimators_) + n_new_trees)
+        with warnings.catch_warnings():
+            # X, y is the full training set, so the "balanced" class weights stay valid
+            warnings.simplefilter('ignore', UserWarning)
+            self.model.fit(X, y)
+        self.model.set_params(warm_start=False)
+        # The secondary models are cheap to refit from scratch
+        self._fit_extra_models(X, y)
+        self.compiled = None
+        self.version = uuid.uuid4().hex
+
+    def compile(self):
+        """Evaluate predictions with the array-backed compiled forest instead of sklearn"""
+        from compiled_forest import CompiledForest
+        self.compiled = CompiledForest.from_sklearn(self.model)
+
+    def is_trained(self):
+        """Return True once the forest has been fitted or loaded"""
+        return self.compiled is not None or hasattr(self.model, 'estimators_')
+
+    def _predict_forest(self, X):
+        if self.compiled is not None:
+            return self.compiled.predict_proba(X)
+        return self.model.predict_proba(X)
+
+    def _predict_blended(self, X, timeout=-1):
+        """Blend forest and secondary model probabilities; return (probabilities, complete)
+
+        Secondary models still running when the timeout expires are dropped
+        from the blend. The default is ensemble_timeout; None waits for all.
+        """
+        if not self.extra_models:
+            return self._predict_forest(X), True
+
+        if timeout == -1:
+            timeout = self.ensemble_timeout
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        X_binary = np.asarray(X) != 0
+        executor = _get_executor()
+        futures = {
+            executor.submit(model.predict_proba, X_binary): name
+            for name, model in self.extra_models.items()
+        }
+        # The forest is scored on the calling thread while the others run
+        blended = self._predict_forest(X)
+        total_weight = 1.0
+        remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        done, not_done = wait(futures, timeout=remaining)
+        for future in done:
+            name = futures[future]
+            if future.exception() is not None:
+                not_done.add(future)
+                continue
+            weight = self.ensemble.get(name, 0.0)
+            blended = blended + weight * future.result()
+            total_weight += weight
+            self.ensemble_stats.setdefault(name, {'used': 0, 'dropped': 0})['used'] += 1
+        for future in not_done:
+            # Late models are left out of this blend instead of stalling the response
+            future.cancel()
+            self.ensemble_stats.setdefault(futures[future], {'used': 0, 'dropped': 0})['dropped'] += 1
+        return blended / total_weight, not not_done
+
     def predict(self, X):
         """Make predictions for given input"""
-        return self.model.predict_proba(X)
+        return self._predict_blended(X)[0]
+
+    @staticmethod
+    def _top_k(probabilities, top_k):
+        top_k = min(top_k, probabilities.shape[1])
+        # Highest probability first, in the same order as the single-row path
+        top_indices = np.argsort(probabilities, axis=1)[:, ::-1][:, :top_k]
+        top_probabilities = np.take_along_axis(probabilities, top_indices, axis=1)
+        return top_indices, top_probabilities
+
+    def predict_batch(self, X, top_k=3):
+        """Return the top-k class indices and probabilities for every row of X"""
+        # Offline batches have no latency budget, so every ensemble model is waited for
+        return self._top_k(self._predict_blended(X, timeout=None)[0], top_k)
+
+    def predict_top_k(self, input_data, top_k=3):
+        """Return the top-k class indices and probabilities for a single input row"""
+        key = None
+        if self.cache is not None:
+            key = (self.cache.make_key(input_data), top_k)
+            cached = self.cache.get(key, self.version)
+            if cached is not None:
+                return cached
+        probabilities, complete = self._predict_blended(input_data)
+        top_indices, top_probabilities = self._top_k(probabilities, top_k)
+        result = (top_indices[0], top_probabilities[0])
+        # A blend that dropped a late model is not cached, so it is not served again
+        if key is not None and complete:
+            # Cached arrays are shared between callers, so make them read-only
+            for array in result:
+                array.setflags(write=False)
+            self.cache.put(key, result, self.version)
+        return result
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import sklearn
+
+class ModelStore:
+    """Stores fitted DiseasePredictor artifacts on disk so the forest is fitted only once.
+
+    An artifact holds the fitted forest, the LabelEncoder and the symptom vocabulary.
+    It is keyed by a hash of the training data (the dataset plus any confirmed
+    cases), the model hyperparameters and the scikit-learn version, so changing
+    any of them produces a new artifact.
+    """
+
+    def __init__(self, store_dir='models'):
+        self.store_dir = store_dir
+
+    def make_key(self, data_paths, params):
+        """Build the artifact key from the training data files and the hyperparameters"""
+        if isinstance(data_paths, str):
+            data_paths = [data_paths]
+        digest = hashlib.sha256()
+        for path in data_paths:
+            digest.update(os.path.basename(path).encode('utf-8'))
+            with open(path, 'rb') as file:
+                for block in iter(lambda: file.read(1 << 20), b''):
+                    digest.update(block)
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(sklearn.__version__.encode('utf-8'))
+        return digest.hexdigest()[:32]
+
+    def get_artifact_path(self, key):
+        """Return the file path used for the given key"""
+        return os.path.join(self.store_dir, f"disease_predictor_{key}.pkl")
+
+    def load(self, key):
+        """Load a stored artifact, or return None if it is missing or unreadable"""
+        path = self.get_artifact_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as file:
+                return pickle.load(file)
+        except Exception as e:
+            print(f"Error loading model artifact: {str(e)}")
+            return None
+
+    def load_latest(self):
+        """Load the most recently saved artifact, or return None if there is none"""
+        try:
+            with open(os.path.join(self.store_dir, 'latest'), 'r', encoding='utf-8') as file:
+                key = file.read().strip()
+        except OSError:
+            return None
+        return self.load(key)
+
+    def _write_atomic(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def save(self, key, artifact):
+        """Write an artifact atomically so concurrent readers never see a partial file"""
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            data = pickle.dumps(dict(artifact, key=key), protocol=pickle.HIGHEST_PROTOCOL)
+            self._write_atomic(self.get_artifact_path(key), data)
+            self._write_atomic(os.path.join(self.store_dir, 'latest'), key.encode('utf-8'))
+        except Exception as e:
+            print(f"Error saving model artifact: {str(e)}")
+
+    def restore(self, artifact, data_processor, predictor):
+        """Copy a loaded artifact into a data processor and predictor"""
+        predictor.model = artifact['model']
+        predictor.extra_models = artifact.get('extra_models', {})
+        predictor.compiled = None
+        predictor.version = artifact.get('key')
+        data_processor.label_encoder = artifact['label_encoder']
+        data_processor.symptoms = list(artifact['symptoms'])
+        return predictor
+
+    def load_or_train(self, data_processor, predictor):
+        """Restore the predictor from disk, fitting and storing it only when no artifact exists"""
+        key = self.make_key(data_processor.get_data_paths(), predictor.get_config())
+        artifact = self.load(key)
+        if artifact is not None:
+            self.restore(artifact, data_processor, predictor)
+            predictor.version = key
+            return predictor
+
+        X, y = data_processor.load_data()
+        if len(X) == 0:
+            raise ValueError("Could not load training data. Please check the dataset files.")
+        predictor.train(X, y)
+        predictor.version = key
+        self.save(key, {
+            'model': predictor.model,
+            'extra_models': predictor.extra_models,
+            'label_encoder': data_processor.label_encoder,
+            'symptoms': list(data_processor.symptoms)
+        })
+        return predictor
@@ -0,0 +1,172 @@
+"""Hyperparameter benchmark harness for DiseasePredictor.
+
+Sweeps forest configurations, scores each one with cross-validation folds run in
+a process pool and measures training time, model size and single-row inference
+latency. The result is printed as a table where configurations on the Pareto
+front of accuracy versus p99 latency are marked with '*'.
+
+When some disease has fewer rows than there are folds (Testing.csv has one or
+two rows per disease), stratified folds are impossible. Each fold then trains
+on all rows and is scored on a copy of the rows with about a third of the
+present symptoms dropped, which mimics users reporting only some symptoms.
+
+Usage:
+    python model_tuning.py --n-estimators 25 50 100 200 --max-depth 5 10 20 none --ensemble
+"""
+import argparse
+import csv
+import itertools
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+from data_processor import DataProcessor
+from model import DiseasePredictor, DEFAULT_ENSEMBLE
+
+def _drop_symptoms(X, rng, keep=0.67):
+    """Randomly drop present symptoms, keeping at least one per row"""
+    X = X.copy()
+    for row in range(X.shape[0]):
+        present = np.flatnonzero(X[row])
+        if len(present) <= 1:
+            continue
+        dropped = present[rng.random(len(present)) > keep]
+        if len(dropped) == len(present):
+            dropped = dropped[1:]
+        X[row, dropped] = 0
+    return X
+
+def make_folds(y, n_folds, seed=42):
+    """Return (train_index, test_index) pairs, or None entries for symptom-dropout folds"""
+    if np.bincount(y).min() >= n_folds:
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+        return list(splitter.split(np.zeros(len(y)), y))
+    return [None] * n_folds
+
+def run_fold(params, X, y, fold, fold_number):
+    """Fit one fold and return (accuracy, training seconds)"""
+    predictor = DiseasePredictor(**params)
+    if fold is None:
+        X_train, y_train = X, y
+        X_test, y_test = _drop_symptoms(X, np.random.default_rng(fold_number)), y
+    else:
+        train_index, test_index = fold
+        X_train, y_train = X[train_index], y[train_index]
+        X_test, y_test = X[test_index], y[test_index]
+
+    start = time.perf_counter()
+    predictor.train(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    # Wait for every secondary model, like predict_batch, so a busy pool cannot
+    # silently turn a blended configuration into the forest alone
+    probabilities = predictor._predict_blended(X_test, timeout=None)[0]
+    assert all(stats['dropped'] == 0 for stats in predictor.ensemble_stats.values()), predictor.ensemble_stats
+    predicted = predictor.model.classes_[np.argmax(probabilities, axis=1)]
+    return float(np.mean(predicted == y_test)), fit_seconds
+
+def measure_latency(predict, X, repeats):
+    """Return p50 and p99 single-row latency in microseconds"""
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        row = X[i % len(X)].reshape(1, -1)
+        start = time.perf_counter()
+        predict(row)
+        timings[i] = time.perf_counter() - start
+    return np.percentile(timings, 50) * 1e6, np.percentile(timings, 99) * 1e6
+
+def pareto_front(results):
+    """Mark results not dominated on (higher accuracy, lower p99 latency)"""
+    for result in results:
+        result['pareto'] = not any(
+            other['accuracy'] >= result['accuracy'] and other['p99_us'] <= result['p99_us']
+            and (other['accuracy'] > result['accuracy'] or other['p99_us'] < result['p99_us'])
+            for other in results
+        )
+    return results
+
+def sweep(configs, X, y, n_folds=5, workers=None, repeats=200):
+    """Evaluate every configuration and return one result dictionary per configuration"""
+    folds = make_folds(y, n_folds)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            index: [pool.submit(run_fold, params, X, y, fold, n) for n, fold in enumerate(folds)]
+            for index, params in enumerate(configs)
+        }
+        fold_scores = {index: [f.result() for f in fs] for index, fs in futures.items()}
+
+    # Size and latency are measured in this process, one model at a time, so the
+    # timings are not disturbed by the pool
+    queries = _drop_symptoms(X, np.random.default_rng(0))
+    results = []
+    for index, params in enumerate(configs):
+        predictor = DiseasePredictor(**params)
+        predictor.train(X, y)
+        p50_sklearn, p99_sklearn = measure_latency(predictor.model.predict_proba, queries, repeats)
+        predictor.compile()
+        p50, p99 = measure_latency(predictor.predict, queries, repeats)
+        accuracies = [score for score, _ in fold_scores[index]]
+        results.append({
+            'n_estimators': params['n_estimators'],
+            'max_depth': params['max_depth'],
+            'ensemble': '+'.join(params.get('ensemble') or {}) or '-',
+            'accuracy': float(np.mean(accuracies)),
+            'accuracy_std': float(np.std(accuracies)),
+            'fit_seconds': float(np.mean([seconds for _, seconds in fold_scores[index]])),
+            # Blended configurations also ship their secondary models; KNN keeps the training rows
+            'size_kb': len(pickle.dumps((predictor.model, predictor.extra_models))) / 1024,
+            'p50_us': p50,
+            'p99_us': p99,
+            'sklearn_p50_us': p50_sklearn,
+            'sklearn_p99_us': p99_sklearn
+        })
+    return pareto_front(results)
+
+def print_table(results, file=sys.stdout):
+    header = (f"{'':1} {'trees':>5} {'depth':>5} {'blend':>17} {'accuracy':>14} {'fit s':>7} {'size KB':>9} "
+              f"{'p50 us':>8} {'p99 us':>8} {'sklearn p50':>12} {'sklearn p99':>12}")
+    print(header, file=file)
+    print('-' * len(header), file=file)
+    for r in sorted(results, key=lambda r: (r['p99_us'], -r['accuracy'])):
+        print(f"{'*' if r['pareto'] else '':1} {r['n_estimators']:>5} {str(r['max_depth']):>5} {r['ensemble']:>17} "
+              f"{r['accuracy']:>8.3f}±{r['accuracy_std']:.3f} {r['fit_seconds']:>7.3f} {r['size_kb']:>9.1f} "
+              f"{r['p50_us']:>8.1f} {r['p99_us']:>8.1f} {r['sklearn_p50_us']:>12.1f} {r['sklearn_p99_us']:>12.1f}",
+              file=file)
+    print("* = Pareto-optimal for accuracy versus compiled p99 latency", file=file)
+
+def _depth(value):
+    return None if value.lower() == 'none' else int(value)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep DiseasePredictor configurations.")
+    parser.add_argument('--n-estimators', type=int, nargs='+', default=[25, 50, 100, 200])
+    parser.add_argument('--max-depth', type=_depth, nargs='+', default=[5, 10, 20, None])
+    parser.add_argument('--ensemble', action='store_true', help="also evaluate every configuration blended with the default ensemble")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument('--repeats', type=int, default=200, help="single-row predictions timed per configuration")
+    parser.add_argument('--csv', help="also write the results to this CSV file")
+    args = parser.parse_args(argv)
+
+    X, y = DataProcessor().load_data()
+    if len(X) == 0:
+        parser.error("could not load the dataset")
+
+    base = DiseasePredictor().params
+    configs = [dict(base, n_estimators=n, max_depth=d) for n, d in itertools.product(args.n_estimators, args.max_depth)]
+    if args.ensemble:
+        configs += [dict(config, ensemble=DEFAULT_ENSEMBLE) for config in configs]
+    results = sweep(configs, X, y, n_folds=args.folds, workers=args.workers or os.cpu_count(), repeats=args.repeats)
+    print_table(results)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+class PredictionCache:
+    """Bounded LRU cache of top-k predictions, keyed by the canonical symptom bitmask.
+
+    Every entry belongs to one model version. When a lookup arrives with a
+    different version (the model was retrained or swapped) the cache is cleared,
+    so stale predictions are never served.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.model_version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(input_data):
+        """Pack the encoded symptoms of a single row into a compact bitmask"""
+        return np.packbits(np.asarray(input_data).ravel() != 0).tobytes()
+
+    def _check_version(self, model_version):
+        if model_version != self.model_version:
+            self._entries.clear()
+            self.model_version = model_version
+
+    def get(self, key, model_version):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            self._check_version(model_version)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, model_version):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._check_version(model_version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return the size and hit/miss counters of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+class RecommendationCache:
+    """Persistent SQLite cache of AI-generated recommendations with a TTL and LRU eviction.
+
+    Entries are keyed by (disease, prompt version, model name), so changing the
+    prompt or the model never serves old answers. The database runs in WAL mode
+    and every Streamlit session and worker process shares the file. Each
+    thread uses its own connection. A short-lived lease row marks a
+    disease that is being generated, so concurrent misses wait for the first
+    caller's answer instead of calling the API again.
+    """
+
+    def __init__(self, path=os.path.join('models', 'recommendations.sqlite3'),
+                 ttl_seconds=7 * 24 * 3600, max_entries=1000, lease_seconds=60):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lease_seconds = lease_seconds
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        connection.execute("""CREATE TABLE IF NOT EXISTS recommendations (
+            disease TEXT NOT NULL, prompt_version TEXT NOT NULL, model TEXT NOT NULL,
+            value TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL,
+            PRIMARY KEY (disease, prompt_version, model))""")
+        connection.execute("CREATE INDEX IF NOT EXISTS recommendations_last_used ON recommendations (last_used)")
+        connection.execute("""CREATE TABLE IF NOT EXISTS leases (
+            disease TEXT NOT NULL, prompt_version TEXT NOT NULL, model TEXT NOT NULL,
+            owner TEXT NOT NULL, expires REAL NOT NULL,
+            PRIMARY KEY (disease, prompt_version, model))""")
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # isolation_level=None: statements autocommit unless wrapped in BEGIN IMMEDIATE
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, disease, prompt_version, model):
+        """Return the cached recommendations, or None if missing or older than the TTL"""
+        now = time.time()
+        key = (str(disease), str(prompt_version), str(model))
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT value FROM recommendations WHERE disease = ? AND prompt_version = ? AND model = ? AND created > ?",
+            key + (now - self.ttl_seconds,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        connection.execute(
+            "UPDATE recommendations SET last_used = ? WHERE disease = ? AND prompt_version = ? AND model = ?",
+            (now,) + key)
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, disease, prompt_version, model, value):
+        """Store recommendations and evict expired and least recently used entries"""
+        now = time.time()
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?, ?, ?)",
+                (str(disease), str(prompt_version), str(model), json.dumps(value), now, now))
+            connection.execute("DELETE FROM recommendations WHERE created <= ?", (now - self.ttl_seconds,))
+            connection.execute(
+                """DELETE FROM recommendations WHERE rowid IN (
+                    SELECT rowid FROM recommendations ORDER BY last_used DESC LIMIT -1 OFFSET ?)""",
+                (self.max_entries,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def acquire(self, disease, prompt_version, model):
+        """Claim the right to generate an entry; return a lease token, or None if another caller holds it"""
+        now = time.time()
+        token = uuid.uuid4().hex
+        key = (str(disease), str(prompt_version), str(model))
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT expires FROM leases WHERE disease = ? AND prompt_version = ? AND model = ?", key).fetchone()
+            if row is not None and row[0] > now:
+                connection.execute("COMMIT")
+                return None
+            # No lease, or the holder died without releasing it
+            connection.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?, ?, ?)",
+                               key + (token, now + self.lease_seconds))
+            connection.execute("COMMIT")
+            return token
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def release(self, disease, prompt_version, model, token):
+        """Give up a lease returned by acquire"""
+        self._connect().execute(
+            "DELETE FROM leases WHERE disease = ? AND prompt_version = ? AND model = ? AND owner = ?",
+            (str(disease), str(prompt_version), str(model), token))
+
+    def wait_for(self, disease, prompt_version, model, timeout=30, interval=0.2):
+        """Wait while another caller generates an entry; return it, or None if the lease ends without one"""
+        key = (str(disease), str(prompt_version), str(model))
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            value = self.get(disease, prompt_version, model)
+            if value is not None:
+                return value
+            row = self._connect().execute(
+                "SELECT expires FROM leases WHERE disease = ? AND prompt_version = ? AND model = ?", key).fetchone()
+            if row is None or row[0] <= time.time():
+                return self.get(disease, prompt_version, model)
+            time.sleep(interval)
+        return None
+
+    def get_or_create(self, disease, prompt_version, model, create, cacheable=None):
+        """Return the cached entry, calling create() at most once per TTL window across all processes
+
+        Values for which cacheable(value) is false (for example error answers)
+        are returned but not stored.
+        """
+        value = self.get(disease, prompt_version, model)
+        if value is not None:
+            return value
+        token = self.acquire(disease, prompt_version, model)
+        if token is None:
+            value = self.wait_for(disease, prompt_version, model, timeout=self.lease_seconds)
+            if value is not None:
+                return value
+            token = self.acquire(disease, prompt_version, model)
+        try:
+            value = create()
+            if cacheable is None or cacheable(value):
+                self.put(disease, prompt_version, model, value)
+            return value
+        finally:
+            if token is not None:
+                self.release(disease, prompt_version, model, token)
+
+    def stats(self):
+        """Return the number of stored entries and the hit/miss counters of this process"""
+        count = self._connect().execute("SELECT COUNT(*) FROM recommendations").fetchone()[0]
+        return {'size': count, 'hits': self.hits, 'misses': self.misses}
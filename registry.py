@@ -0,0 +1,163 @@
+import os
+import threading
+
+# The component modules pull in pandas and scikit-learn, so they are imported by
+# the factories below, on the warm-up thread, instead of when registry is imported.
+
+# Process-wide instances shared by every Streamlit session and mode.
+# They are built once under a per-instance lock and must be treated as read-only
+# afterwards. A caller asking for an instance that is still being built (for
+# example by the warm-up thread) waits for it instead of building its own.
+_lock = threading.RLock()
+_locks = {}
+_instances = {}
+
+_warmup_thread = None
+_warmup_error = None
+_ready = threading.Event()
+
+def _instance_lock(name):
+    with _lock:
+        return _locks.setdefault(name, threading.RLock())
+
+def _get_or_create(name, factory):
+    """Return the shared instance for name, building it on first use"""
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+    with _instance_lock(name):
+        # Another thread may have built it while we were waiting for the lock
+        instance = _instances.get(name)
+        if instance is None:
+            instance = factory()
+            _instances[name] = instance
+        return instance
+
+def _prepare_predictor(predictor, cache=None):
+    """Set up a trained predictor for serving interactive requests"""
+    from prediction_cache import PredictionCache
+    # Interactive requests are single rows, where the compiled forest is much faster
+    if predictor.compiled is None:
+        predictor.compile()
+    predictor.cache = cache if cache is not None else PredictionCache(max_size=1024)
+    return predictor
+
+def _load_model():
+    """Build the data processor and predictor pair from the model store"""
+    from data_processor import DataProcessor
+    from model import DiseasePredictor
+    data_processor = DataProcessor()
+    # The forest is served alone: on Testing.csv the blend in model.DEFAULT_ENSEMBLE
+    # did not improve accuracy and added ~0.5 ms p99 (see model_tuning.py --ensemble)
+    predictor = DiseasePredictor()
+    compact_dir = os.getenv("COMPACT_MODEL_DIR")
+    if compact_dir and os.path.exists(os.path.join(compact_dir, 'meta.json')):
+        # Serving replicas can memory-map the quantized model instead of unpickling the forest
+        from compact_model import restore_compact
+        restore_compact(compact_dir, data_processor, predictor)
+    else:
+        get_model_store().load_or_train(data_processor, predictor)
+    return data_processor, _prepare_predictor(predictor)
+
+def get_model_store():
+    """Return the shared model artifact store"""
+    from model_store import ModelStore
+    return _get_or_create('model_store', ModelStore)
+
+def get_data_processor():
+    """Return the shared DataProcessor, with its vocabulary and label encoder loaded"""
+    return _get_or_create('model', _load_model)[0]
+
+def get_predictor():
+    """Return the shared, already trained DiseasePredictor"""
+    return _get_or_create('model', _load_model)[1]
+
+def get_symptom_index():
+    """Return the shared symptom index, picking up any rows added to the dataset or the feedback log"""
+    from symptom_index import SymptomIndex
+    data_processor = get_data_processor()
+    index = _get_or_create('symptom_index', lambda: SymptomIndex(data_processor.get_dataset_path(), data_processor))
+    index.refresh()
+    return index
+
+def get_case_store():
+    """Return the shared store of training cases for similar-case lookup"""
+    from case_store import CaseStore
+    from data_processor import DataProcessor
+    # A separate DataProcessor, so loading the cases never touches the shared encoder
+    return _get_or_create('case_store', lambda: CaseStore.from_data_processor(DataProcessor()))
+
+def get_knowledge_base():
+    """Return the shared HealthKnowledgeBase"""
+    from health_knowledge_base import HealthKnowledgeBase
+    return _get_or_create('knowledge_base', HealthKnowledgeBase)
+
+def get_recommendation_cache():
+    """Return the shared on-disk cache of AI-generated recommendations"""
+    from recommendation_cache import RecommendationCache
+    return _get_or_create('recommendation_cache', RecommendationCache)
+
+def get_gemini_client():
+    """Return the shared Gemini API client with its keep-alive connection pool"""
+    from gemini_client import GeminiClient
+    return _get_or_create('gemini_client', GeminiClient.from_env)
+
+def get_translator():
+    """Return the shared batched translator with its on-disk translation cache"""
+    from translator import Translator
+    return _get_or_create('translator', lambda: Translator(get_gemini_client()))
+
+def _warm_up():
+    global _warmup_error
+    try:
+        get_predictor()
+        get_symptom_index()
+        get_case_store()
+        get_knowledge_base()
+    except Exception as e:
+        _warmup_error = e
+        print(f"Error warming up the model: {str(e)}")
+    finally:
+        _ready.set()
+
+def start_warmup():
+    """Start loading the shared components in a background thread (once per process)"""
+    global _warmup_thread
+    with _lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm_up, name='model-warmup', daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+def is_ready():
+    """Return True once the warm-up has finished"""
+    return _ready.is_set()
+
+def wait_until_ready(timeout=None):
+    """Start the warm-up if needed and wait for it; return True if it finished in time"""
+    start_warmup()
+    return _ready.wait(timeout)
+
+def get_warmup_error():
+    """Return the exception raised during warm-up, if any"""
+    return _warmup_error
+
+def swap_model(data_processor, predictor):
+    """Replace the shared data processor and predictor with a newly trained pair"""
+    with _instance_lock('model'):
+        previous = _instances.get('model')
+        # The cache is reused; the new model version invalidates its entries
+        cache = previous[1].cache if previous is not None else None
+        _instances['model'] = (data_processor, _prepare_predictor(predictor, cache))
+    # The new model may have been trained on more cases; rebuild the store on next use
+    with _instance_lock('case_store'):
+        _instances.pop('case_store', None)
+
+def reset():
+    """Drop all shared instances so they are rebuilt on next use"""
+    global _warmup_thread, _warmup_error
+    with _lock:
+        _instances.clear()
+        _warmup_thread = None
+        _warmup_error = None
+        _ready.clear()
@@ -0,0 +1,88 @@
+"""Import-time report and cold-start budget check.
+
+Imports a module in a fresh interpreter with `python -X importtime` and prints
+the cumulative cost of every module it imports directly. With --budget-ms the
+script exits with status 1 when the median cold import is over the budget, so it
+can gate a CI job or a replica image build.
+
+Usage:
+    python startup_report.py
+    python startup_report.py app --runs 5 --budget-ms 400
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def parse_importtime(output):
+    """Return (module, depth, self microseconds, cumulative microseconds) for every import line"""
+    entries = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return entries
+
+def measure_import(module):
+    """Import module in a fresh interpreter and return its parsed import-time entries"""
+    env = dict(os.environ)
+    # app.py stops early without a key; the value is never used during import
+    env.setdefault('GEMINI_API_KEY', 'startup-report')
+    env['PYTHONWARNINGS'] = 'ignore'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def direct_imports(entries, module):
+    """Return (total microseconds, [(child, cumulative microseconds)]) for a top-level import"""
+    # importtime lists the imports of a module before the module itself, one level deeper
+    children = []
+    for name, depth, _, cumulative in entries:
+        if depth == 1:
+            children.append((name, cumulative))
+        elif depth == 0:
+            if name == module:
+                return cumulative, sorted(children, key=lambda item: -item[1])
+            children = []
+    raise RuntimeError(f"{module} is missing from the import-time output")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import costs and check a cold-start budget.")
+    parser.add_argument('module', nargs='?', default='app')
+    parser.add_argument('--runs', type=int, default=3, help="fresh interpreters to start; the median is reported")
+    parser.add_argument('--budget-ms', type=float, default=None, help="fail when the median import takes longer")
+    parser.add_argument('--top', type=int, default=15, help="direct imports to list")
+    args = parser.parse_args(argv)
+
+    totals = []
+    for _ in range(max(1, args.runs)):
+        total, children = direct_imports(measure_import(args.module), args.module)
+        totals.append(total)
+    median_ms = statistics.median(totals) / 1e3
+
+    # Breakdown from the last run, when the bytecode caches are warm
+    print(f"{'module':<40} {'cumulative ms':>14}")
+    print('-' * 55)
+    for name, cumulative in children[:args.top]:
+        print(f"{name:<40} {cumulative / 1e3:>14.1f}")
+    print('-' * 55)
+    print(f"{'import ' + args.module + ' (median of ' + str(len(totals)) + ')':<40} {median_ms:>14.1f}")
+
+    if args.budget_ms is not None:
+        if median_ms > args.budget_ms:
+            print(f"FAIL: cold start {median_ms:.1f} ms is over the {args.budget_ms:.1f} ms budget")
+            return 1
+        print(f"OK: cold start {median_ms:.1f} ms is within the {args.budget_ms:.1f} ms budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
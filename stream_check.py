@@ -0,0 +1,86 @@
+"""Regression check of the streamed AI recommendations against the local Gemini stub.
+
+Runs the recommendations panel's worker against gemini_stub.py three times:
+with a complete stream, which must show and cache every section; with a stream
+that breaks off halfway, which must show an error in the missing sections and
+cache nothing; and with a render that a rerun interrupts after the first
+section, whose answer (with sections long enough to summarize) must still be
+cached in the background. Exits with status 1 when any check fails.
+
+Usage:
+    python stream_check.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+def run_check(app, cache, disease):
+    """Return (shown sections, sections with errors, cached value) for one panel render"""
+    shown, errors = [], []
+    for item_disease, section_name, section in app.iter_ai_recommendations([disease], cache):
+        if section_name is None:
+            continue
+        (errors if isinstance(section, Exception) else shown).append(section_name)
+    return shown, errors, cache.get(disease, app.RECOMMENDATIONS_PROMPT_VERSION, app.registry.get_gemini_client().model)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check streamed AI recommendations against the Gemini stub.")
+    parser.add_argument('--truncate', type=float, default=0.5, help="share of the answer sent before the stream breaks")
+    parser.add_argument('--wait', type=float, default=15.0,
+                        help="seconds to wait for the interrupted render to reach the cache")
+    args = parser.parse_args(argv)
+
+    import gemini_stub
+    server = gemini_stub.serve(port=0, delay=0.0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['GEMINI_API_BASE'] = f"http://127.0.0.1:{server.server_address[1]}/v1beta"
+    os.environ['GEMINI_STREAMING'] = "1"
+    os.environ.setdefault('GEMINI_API_KEY', "stub")
+    import app
+    from recommendation_cache import RecommendationCache
+    cache = RecommendationCache(os.path.join(tempfile.mkdtemp(), 'recommendations.sqlite3'))
+
+    failures = 0
+    shown, errors, cached = run_check(app, cache, "Complete stream")
+    if sorted(shown) == sorted(app.RECOMMENDATION_SECTIONS) and not errors and cached is not None:
+        print(f"OK: complete stream showed and cached all {len(shown)} sections")
+    else:
+        print(f"FAIL: complete stream showed {shown}, errors in {errors}, cached: {cached is not None}")
+        failures += 1
+
+    server.RequestHandlerClass.truncate = args.truncate
+    shown, errors, cached = run_check(app, cache, "Broken stream")
+    missing = [name for name in app.RECOMMENDATION_SECTIONS if name not in shown]
+    if missing and sorted(errors) == sorted(missing) and cached is None:
+        print(f"OK: broken stream showed {shown}, errors in {errors}, nothing cached")
+    else:
+        print(f"FAIL: broken stream showed {shown}, errors in {errors}, cached: {cached is not None}")
+        failures += 1
+
+    server.RequestHandlerClass.truncate = 0.0
+    server.RequestHandlerClass.long_sections = True
+    server.RequestHandlerClass.delay = 0.02
+    render = app.iter_ai_recommendations(["Interrupted render"], cache)
+    next(render)
+    # What a Streamlit rerun does to the panel's generator
+    render.close()
+    deadline = time.time() + args.wait
+    cached = None
+    while cached is None and time.time() < deadline:
+        time.sleep(0.1)
+        cached = cache.get("Interrupted render", app.RECOMMENDATIONS_PROMPT_VERSION,
+                           app.registry.get_gemini_client().model)
+    if cached is not None and sorted(cached) == sorted(app.RECOMMENDATION_SECTIONS):
+        print(f"OK: interrupted render still cached all {len(cached)} sections in the background")
+    else:
+        print(f"FAIL: interrupted render cached {sorted(cached) if cached else None} within {args.wait} s")
+        failures += 1
+
+    server.shutdown()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Chunked loader for large symptom CSV files.
+
+The CSV (one 0/1 column per symptom, then ``prognosis``) is read with pandas in
+fixed-size chunks with explicit uint8 dtypes. Each chunk is validated and copied
+into a matrix that is allocated once up front, either one uint8 per symptom or
+bit-packed with eight symptoms per byte. Peak memory is therefore the output
+matrix plus one chunk, instead of a whole int64 DataFrame and its copies.
+
+Usage:
+    python streaming_loader.py dataset/Testing.csv --chunk-size 50000 --packed
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+class SymptomDataset:
+    """A parsed symptom dataset: uint8 feature matrix, encoded labels and vocabularies"""
+
+    def __init__(self, X, y, classes, symptoms):
+        self.X = X
+        self.y = y
+        self.classes = classes
+        self.symptoms = symptoms
+
+def read_header(path):
+    """Return the symptom columns of a dataset CSV, checking that prognosis comes last"""
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    if not columns or columns[-1] != 'prognosis':
+        raise ValueError(f"{path} must end with a 'prognosis' column")
+    return columns[:-1]
+
+def count_rows(path):
+    """Count the data rows of a CSV by scanning for line breaks"""
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1
+    # Without the header; blank lines make this an upper bound
+    return max(lines - 1, 0)
+
+def packed_width(n_symptoms):
+    """Return the number of bytes per row of a bit-packed symptom matrix"""
+    return (n_symptoms + 7) // 8
+
+def unpack(X_packed, n_symptoms):
+    """Expand a bit-packed matrix back into one uint8 column per symptom"""
+    return np.unpackbits(X_packed, axis=1, count=n_symptoms)
+
+def load_csv_chunked(path, chunk_size=50000, packed=False, allocate=None):
+    """Stream a dataset CSV into a preallocated matrix and return a SymptomDataset
+
+    allocate(shape) may return the output array (for example a writable memory
+    map); it defaults to np.zeros with dtype uint8. Label codes follow the sorted
+    class names, like LabelEncoder.
+    """
+    symptoms = read_header(path)
+    n_rows = count_rows(path)
+    width = packed_width(len(symptoms)) if packed else len(symptoms)
+    X = np.zeros((n_rows, width), dtype=np.uint8) if allocate is None else allocate((n_rows, width))
+    codes = np.empty(n_rows, dtype=np.int32)
+    label_codes = {}
+
+    dtypes = {symptom: np.uint8 for symptom in symptoms}
+    dtypes['prognosis'] = str
+    start = 0
+    try:
+        chunks = pd.read_csv(path, dtype=dtypes, chunksize=chunk_size)
+        for chunk in chunks:
+            end = start + len(chunk)
+            if end > n_rows:
+                raise ValueError(f"more rows than counted ({n_rows})")
+            values = chunk[symptoms].to_numpy(dtype=np.uint8)
+            if values.size and values.max() > 1:
+                raise ValueError(f"rows {start + 1}-{end} contain symptom values other than 0 and 1")
+            labels = chunk['prognosis']
+            if labels.isna().any():
+                raise ValueError(f"rows {start + 1}-{end} have an empty prognosis")
+
+            X[start:end] = np.packbits(values, axis=1) if packed else values
+            chunk_codes, uniques = pd.factorize(labels)
+            lookup = np.array([label_codes.setdefault(label, len(label_codes)) for label in uniques], dtype=np.int32)
+            codes[start:end] = lookup[chunk_codes]
+            start = end
+    except (TypeError, ValueError) as e:
+        # pandas reports a bad value in a uint8 column as a failed conversion
+        raise ValueError(f"Invalid dataset {path} (chunk starting at row {start + 1}): {str(e)}") from e
+    if start == 0:
+        raise ValueError("Dataset is empty")
+
+    # Renumber the codes in sorted class order, which is what LabelEncoder produces
+    classes = np.array(sorted(label_codes), dtype=object)
+    order = np.empty(len(label_codes), dtype=np.int32)
+    order[[label_codes[label] for label in classes]] = np.arange(len(classes), dtype=np.int32)
+    return SymptomDataset(X[:start], order[codes[:start]], classes, symptoms)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load a symptom CSV in chunks and report memory use.")
+    parser.add_argument('path')
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--packed', action='store_true', help="store eight symptoms per byte")
+    args = parser.parse_args(argv)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    dataset = load_csv_chunked(args.path, chunk_size=args.chunk_size, packed=args.packed)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"rows: {len(dataset.y)}  symptoms: {len(dataset.symptoms)}  classes: {len(dataset.classes)}")
+    print(f"matrix: {dataset.X.nbytes / 2**20:.1f} MB ({'bit-packed' if args.packed else 'uint8'})")
+    print(f"peak traced memory: {peak / 2**20:.1f} MB   load time: {seconds:.2f} s")
+
+if __name__ == "__main__":
+    main()
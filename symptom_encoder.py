@@ -0,0 +1,87 @@
+import re
+import numpy as np
+
+# Common spellings that differ from the dataset column names.
+# Ambiguous terms such as "weakness" are left out on purpose and reported as unknown.
+SYMPTOM_ALIASES = {
+    'diarrhea': 'diarrhoea',
+}
+
+_SEPARATORS = re.compile(r'[\s_\-]+')
+
+def normalize_symptom(name):
+    """Return the lookup form of a symptom name: lower-case words joined by single underscores"""
+    return _SEPARATORS.sub('_', str(name).strip().lower()).strip('_')
+
+class SymptomEncoder:
+    """Encodes symptom names into model input rows with a precomputed name-to-column index.
+
+    Exact column names, their normalized forms ("Spotting urination" finds the
+    "spotting_ urination" column) and SYMPTOM_ALIASES all resolve in one dict
+    lookup. Names that resolve to no column are returned to the caller instead of
+    being dropped silently.
+    """
+
+    def __init__(self, symptoms, aliases=None):
+        self.symptoms = list(symptoms)
+        self.column_index = {symptom: i for i, symptom in enumerate(self.symptoms)}
+        for i, symptom in enumerate(self.symptoms):
+            self.column_index.setdefault(normalize_symptom(symptom), i)
+        for alias, target in (SYMPTOM_ALIASES if aliases is None else aliases).items():
+            column = self.column_index.get(normalize_symptom(target))
+            if column is not None:
+                self.column_index.setdefault(normalize_symptom(alias), column)
+
+    def column(self, symptom):
+        """Return the feature column for a symptom name, or None if it is unknown"""
+        column = self.column_index.get(symptom)
+        if column is None:
+            column = self.column_index.get(normalize_symptom(symptom))
+        return column
+
+    def resolve(self, symptom):
+        """Return the dataset column name for a symptom name, or None if it is unknown"""
+        column = self.column(symptom)
+        return None if column is None else self.symptoms[column]
+
+    def _index(self, symptom_lists):
+        """Map symptom lists to CSR index arrays in one pass; return (indptr, indices, unknown)"""
+        indptr = [0]
+        indices = []
+        unknown = []
+        column_index = self.column_index
+        for row, symptoms in enumerate(symptom_lists):
+            seen = set()
+            for symptom in symptoms:
+                column = column_index.get(symptom)
+                if column is None:
+                    column = column_index.get(normalize_symptom(symptom))
+                    if column is None:
+                        unknown.append((row, symptom))
+                        continue
+                if column not in seen:
+                    seen.add(column)
+                    indices.append(column)
+            indptr.append(len(indices))
+        return np.asarray(indptr, dtype=np.int64), np.asarray(indices, dtype=np.int32), unknown
+
+    def encode_batch(self, symptom_lists, sparse=False):
+        """Encode an iterable of symptom lists; return (matrix, [(row, unknown symptom)])
+
+        The matrix is a dense uint8 array, or a scipy.sparse CSR matrix when
+        sparse=True, with one row per list and one column per symptom.
+        """
+        indptr, indices, unknown = self._index(symptom_lists)
+        n_rows = len(indptr) - 1
+        if sparse:
+            from scipy.sparse import csr_matrix
+            data = np.ones(len(indices), dtype=np.uint8)
+            return csr_matrix((data, indices, indptr), shape=(n_rows, len(self.symptoms))), unknown
+        matrix = np.zeros((n_rows, len(self.symptoms)), dtype=np.uint8)
+        matrix[np.repeat(np.arange(n_rows), np.diff(indptr)), indices] = 1
+        return matrix, unknown
+
+    def encode(self, symptoms):
+        """Encode one symptom list; return (row of shape (1, n_symptoms), unknown symptoms)"""
+        matrix, unknown = self.encode_batch([symptoms])
+        return matrix, [symptom for _, symptom in unknown]
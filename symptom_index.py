@@ -0,0 +1,173 @@
+import csv
+import hashlib
+import io
+import os
+import threading
+import numpy as np
+
+def _file_stat(path):
+    """Return (mtime, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class SymptomIndex:
+    """Inverted index from symptoms to the diseases and training rows that contain them.
+
+    Alongside the index it keeps per-disease symptom counts, from which the
+    characteristic symptom profile of every disease is read. When rows are
+    appended to the dataset only the new rows are indexed; any other change to
+    the file triggers a full rebuild. Given a data_processor, the confirmed
+    cases of its feedback log are indexed after the dataset rows, as in
+    training, and any change to that log also triggers a rebuild.
+    """
+
+    def __init__(self, dataset_path, data_processor=None):
+        self.dataset_path = dataset_path
+        self.data_processor = data_processor
+        self._lock = threading.RLock()
+        self.rebuild()
+
+    def rebuild(self):
+        """Index the whole dataset from scratch"""
+        with self._lock:
+            self.symptoms = []
+            self.diseases = []
+            self.row_labels = []
+            self.symptom_rows = {}
+            self.symptom_diseases = {}
+            self._disease_counts = {}
+            self._symptom_counts = {}
+            self._offset = 0
+            self._digest = hashlib.sha256()
+            self._stat = None
+            self._confirmed_rows = 0
+            self._confirmed_stat = None
+            self._read_new_rows()
+            if self.data_processor is not None:
+                self._read_confirmed_cases()
+
+    def refresh(self):
+        """Index rows added to the dataset since the last call; rebuild if it was rewritten"""
+        with self._lock:
+            if (self.data_processor is not None
+                    and self._confirmed_stat != _file_stat(self.data_processor.confirmed_cases_path)):
+                self.rebuild()
+                return True
+            stat = os.stat(self.dataset_path)
+            if self._stat == (stat.st_mtime_ns, stat.st_size):
+                return False
+            # Confirmed cases are numbered after the dataset rows, so new dataset
+            # rows can only be appended when there are none
+            if stat.st_size < self._offset or self._confirmed_rows or not self._prefix_unchanged():
+                self.rebuild()
+            else:
+                self._read_new_rows()
+            return True
+
+    def _prefix_unchanged(self):
+        """Check that the bytes already indexed are still the start of the file"""
+        digest = hashlib.sha256()
+        with open(self.dataset_path, 'rb') as file:
+            remaining = self._offset
+            while remaining > 0:
+                block = file.read(min(remaining, 1 << 20))
+                if not block:
+                    return False
+                digest.update(block)
+                remaining -= len(block)
+        return digest.digest() == self._digest.digest()
+
+    def _read_new_rows(self):
+        """Parse complete lines after the current offset and add them to the index"""
+        stat = os.stat(self.dataset_path)
+        with open(self.dataset_path, 'rb') as file:
+            file.seek(self._offset)
+            data = file.read()
+        # Only consume whole lines so a row being written is picked up next time
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            self._stat = (stat.st_mtime_ns, stat.st_size)
+            return
+        data = data[:end]
+        self._digest.update(data)
+        self._offset += end
+        self._stat = (stat.st_mtime_ns, stat.st_size)
+
+        reader = csv.reader(io.StringIO(data.decode('utf-8')))
+        if not self.symptoms:
+            header = next(reader, None)
+            if header is None:
+                return
+            self.symptoms = header[:-1]
+            self.symptom_rows = {symptom: [] for symptom in self.symptoms}
+            self.symptom_diseases = {symptom: set() for symptom in self.symptoms}
+
+        n_symptoms = len(self.symptoms)
+        for values in reader:
+            if len(values) != n_symptoms + 1:
+                continue
+            self._add_row(values[-1], [column for column, value in enumerate(values[:-1])
+                                       if value.strip() not in ('', '0')])
+
+    def _read_confirmed_cases(self):
+        """Index the feedback log's confirmed cases, resolving symptom names like training does"""
+        self._confirmed_stat = _file_stat(self.data_processor.confirmed_cases_path)
+        cases = self.data_processor.load_confirmed_cases()
+        if not cases or not self.symptoms:
+            return
+        encoder = self.data_processor.get_encoder()
+        encoded, _ = encoder.encode_batch([symptoms for symptoms, _ in cases])
+        columns = {symptom: column for column, symptom in enumerate(self.symptoms)}
+        for (_, disease), row in zip(cases, encoded):
+            present = [columns[encoder.symptoms[i]] for i in np.flatnonzero(row) if encoder.symptoms[i] in columns]
+            # Cases without any known symptom are not trained on either
+            if present:
+                self._add_row(disease, present)
+                self._confirmed_rows += 1
+
+    def _add_row(self, disease, columns):
+        """Add one row with the given symptom columns present"""
+        row = len(self.row_labels)
+        self.row_labels.append(disease)
+        if disease not in self._disease_counts:
+            self.diseases.append(disease)
+            self._disease_counts[disease] = 0
+            self._symptom_counts[disease] = np.zeros(len(self.symptoms), dtype=np.int64)
+        self._disease_counts[disease] += 1
+        counts = self._symptom_counts[disease]
+        for column in columns:
+            symptom = self.symptoms[column]
+            self.symptom_rows[symptom].append(row)
+            self.symptom_diseases[symptom].add(disease)
+            counts[column] += 1
+
+    def candidate_diseases(self, symptoms):
+        """Return diseases sharing at least one symptom, most shared symptoms first"""
+        with self._lock:
+            matches = {}
+            for symptom in symptoms:
+                for disease in self.symptom_diseases.get(symptom, ()):
+                    matches[disease] = matches.get(disease, 0) + 1
+        return sorted(matches.items(), key=lambda item: (-item[1], item[0]))
+
+    def rows_with_symptom(self, symptom):
+        """Return the training row numbers that contain the symptom"""
+        with self._lock:
+            return list(self.symptom_rows.get(symptom, []))
+
+    def disease_profile(self, disease):
+        """Return the fraction of a disease's rows that contain each of its symptoms"""
+        with self._lock:
+            total = self._disease_counts.get(disease)
+            if not total:
+                return {}
+            counts = self._symptom_counts[disease]
+            order = np.argsort(-counts, kind='stable')
+            return {self.symptoms[i]: float(counts[i] / total) for i in order if counts[i] > 0}
+
+    def characteristic_symptoms(self, disease, top_n=8):
+        """Return the symptoms most often recorded for a disease"""
+        return list(self.disease_profile(disease))[:top_n]
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Part of every cache key; bump it whenever the translation prompt changes
+TRANSLATION_PROMPT_VERSION = "1"
+
+TRANSLATION_PROMPT = (
+    "Translate each string in this JSON array to English (medical context, keep it concise). "
+    "Answer with a JSON array of the translations, in the same order and with the same length:\n"
+)
+
+class TranslationCache:
+    """Persistent SQLite cache of translations keyed by the hash of the source text.
+
+    Shared by all sessions and worker processes through WAL mode, with one
+    connection per thread. Translations do not go stale, so there is no TTL;
+    the least recently written entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, path=os.path.join('models', 'translations.sqlite3'), max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute("""CREATE TABLE IF NOT EXISTS translations (
+            key TEXT PRIMARY KEY, translation TEXT NOT NULL, created REAL NOT NULL)""")
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def make_key(text, model):
+        return hashlib.sha256(f"{TRANSLATION_PROMPT_VERSION}\0{model}\0{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: translation} for the keys that are cached"""
+        found = {}
+        keys = list(keys)
+        connection = self._connect()
+        # Stay well below SQLite's limit on bound parameters
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = connection.execute(
+                f"SELECT key, translation FROM translations WHERE key IN ({','.join('?' * len(batch))})", batch)
+            found.update(rows)
+        return found
+
+    def put_many(self, items):
+        """Store (key, translation) pairs and evict the oldest entries beyond max_entries"""
+        now = time.time()
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?)",
+                                   [(key, translation, now) for key, translation in items])
+            connection.execute(
+                """DELETE FROM translations WHERE rowid IN (
+                    SELECT rowid FROM translations ORDER BY created DESC LIMIT -1 OFFSET ?)""",
+                (self.max_entries,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+class Translator:
+    """Translates many strings to English in batched Gemini requests, each distinct string only once"""
+
+    def __init__(self, client, cache=None, batch_size=50):
+        self.client = client
+        self.cache = cache if cache is not None else TranslationCache()
+        self.batch_size = batch_size
+
+    def _request(self, texts):
+        """Translate a list of strings in one request; return None if the answer does not line up"""
+        config = {
+            "responseMimeType": "application/json",
+            "responseSchema": {"type": "ARRAY", "items": {"type": "STRING"}},
+        }
+        answer = self.client.generate_text(TRANSLATION_PROMPT + json.dumps(texts, ensure_ascii=False),
+                                           generation_config=config)
+        translations = json.loads(answer)
+        if not isinstance(translations, list) or len(translations) != len(texts):
+            return None
+        return [str(t) for t in translations]
+
+    def translate_all(self, texts):
+        """Return {text: English translation} for texts, falling back to the text itself on failure"""
+        texts = list(dict.fromkeys(t for t in texts if isinstance(t, str) and t.strip()))
+        keys = {text: self.cache.make_key(text, self.client.model) for text in texts}
+        cached = self.cache.get_many(keys.values())
+        result = {text: cached[keys[text]] for text in texts if keys[text] in cached}
+        missing = [text for text in texts if text not in result]
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            try:
+                translations = self._request(batch)
+            except Exception as e:
+                print(f"Error translating recommendations: {str(e)}")
+                translations = None
+            if translations is None:
+                # Not cached, so the next panel render tries again
+                result.update((text, text) for text in batch)
+                continue
+            result.update(zip(batch, translations))
+            self.cache.put_many((keys[text], translation) for text, translation in zip(batch, translations))
+        return result